@@ -0,0 +1,106 @@
+"""canonical ingredients dictionary referenced by recipe_ingredients
+
+Revision ID: ingredients_20251017
+Revises: trgm_20251017
+Create Date: 2025-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "ingredients_20251017"
+down_revision = "trgm_20251017"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10000
+
+# Must match backend.core.text.normalize_term
+NORMALIZE = (
+    "regexp_replace(replace(lower(regexp_replace({col}, '^\\s+|\\s+$', '', 'g')),"
+    " 'ё', 'е'), '\\s+', ' ', 'g')"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingredients",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(length=255), nullable=False),
+        sa.UniqueConstraint("name", name="uq_ingredients_name"),
+    )
+    op.add_column(
+        "recipe_ingredients", sa.Column("ingredient_id", sa.Integer(), nullable=True)
+    )
+
+    normalized = NORMALIZE.format(col="name")
+    op.execute(
+        f"""
+        INSERT INTO ingredients (name)
+        SELECT DISTINCT {normalized} FROM recipe_ingredients
+        WHERE {normalized} <> ''
+        ON CONFLICT (name) DO NOTHING
+        """
+    )
+    # Blank names cannot be matched to the dictionary and are dropped
+    op.execute(f"DELETE FROM recipe_ingredients WHERE {normalized} = ''")
+
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(
+            sa.text("SELECT coalesce(max(id), 0) FROM recipe_ingredients")
+        ).scalar()
+        for lo in range(0, max_id + 1, BATCH_SIZE):
+            conn.execute(
+                sa.text(
+                    f"""
+                    UPDATE recipe_ingredients ri SET ingredient_id = i.id
+                    FROM ingredients i
+                    WHERE i.name = {NORMALIZE.format(col="ri.name")}
+                      AND ri.id >= :lo AND ri.id < :hi
+                    """
+                ),
+                {"lo": lo, "hi": lo + BATCH_SIZE},
+            )
+
+    op.alter_column("recipe_ingredients", "ingredient_id", nullable=False)
+    op.create_foreign_key(
+        "fk_recipe_ingredients_ingredient_id",
+        "recipe_ingredients",
+        "ingredients",
+        ["ingredient_id"],
+        ["id"],
+    )
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipe_ingredients_ingredient_id
+            ON recipe_ingredients (ingredient_id)
+            """
+        )
+        # Substring search now runs over the dictionary instead of every recipe row
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_ingredients_name_trgm
+            ON ingredients USING GIN (name gin_trgm_ops)
+            """
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recipe_ingredients_name_trgm")
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_recipe_ingredients_name_trgm
+        ON recipe_ingredients USING GIN (name gin_trgm_ops)
+        """
+    )
+    op.execute("DROP INDEX IF EXISTS ix_ingredients_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_recipe_ingredients_ingredient_id")
+    op.drop_constraint(
+        "fk_recipe_ingredients_ingredient_id", "recipe_ingredients", type_="foreignkey"
+    )
+    op.drop_column("recipe_ingredients", "ingredient_id")
+    op.drop_table("ingredients")
@@ -0,0 +1,28 @@
+"""pending_deletes: S3 objects queued for the background sweeper
+
+Revision ID: pending_deletes_20251017
+Revises: photo_widths_20251017
+Create Date: 2025-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "pending_deletes_20251017"
+down_revision = "photo_widths_20251017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pending_deletes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(length=1024), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pending_deletes")
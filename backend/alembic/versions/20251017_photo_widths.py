@@ -0,0 +1,33 @@
+"""photo_widths: widths of generated image derivatives
+
+Revision ID: photo_widths_20251017
+Revises: updated_at_20251017
+Create Date: 2025-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "photo_widths_20251017"
+down_revision = "updated_at_20251017"
+branch_labels = None
+depends_on = None
+
+TABLES = ("recipes", "recipe_steps", "users")
+
+
+def upgrade() -> None:
+    # Nullable, no default: metadata-only change. Existing photos get a srcset
+    # once they are re-uploaded
+    for table in TABLES:
+        op.add_column(
+            table,
+            sa.Column("photo_widths", postgresql.ARRAY(sa.Integer()), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.drop_column(table, "photo_widths")
@@ -0,0 +1,25 @@
+"""index recipes (created_at, id) for keyset pagination
+
+Revision ID: keyset_20251017
+Revises: increase_ingredient_length
+Create Date: 2025-10-17
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "keyset_20251017"
+down_revision = "increase_ingredient_length"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Feed is ordered by (created_at, id) in both directions; one btree covers both
+    op.create_index(
+        "ix_recipes_created_at_id", "recipes", ["created_at", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_recipes_created_at_id", table_name="recipes")
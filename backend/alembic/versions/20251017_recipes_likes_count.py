@@ -0,0 +1,58 @@
+"""denormalized recipes.likes_count
+
+Revision ID: likes_count_20251017
+Revises: keyset_20251017
+Create Date: 2025-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "likes_count_20251017"
+down_revision = "keyset_20251017"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite on PostgreSQL 11+
+    op.add_column(
+        "recipes",
+        sa.Column("likes_count", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+    # Backfill in id ranges, each committed separately, so a large table
+    # is never locked for the whole migration
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM recipes")).scalar()
+        for lo in range(0, max_id + 1, BATCH_SIZE):
+            conn.execute(
+                sa.text(
+                    """
+                    UPDATE recipes r SET likes_count = l.cnt
+                    FROM (
+                        SELECT recipe_id, count(*) AS cnt FROM likes
+                        WHERE recipe_id >= :lo AND recipe_id < :hi
+                        GROUP BY recipe_id
+                    ) l
+                    WHERE r.id = l.recipe_id
+                    """
+                ),
+                {"lo": lo, "hi": lo + BATCH_SIZE},
+            )
+        # Popular ordering and its keyset cursor
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_popular
+            ON recipes (likes_count DESC, created_at DESC, id DESC)
+            """
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_recipes_popular")
+    op.drop_column("recipes", "likes_count")
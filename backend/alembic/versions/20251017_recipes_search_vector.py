@@ -0,0 +1,146 @@
+"""stored recipes.search_vector maintained by triggers
+
+Revision ID: search_vector_20251017
+Revises: likes_count_20251017
+Create Date: 2025-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "search_vector_20251017"
+down_revision = "likes_count_20251017"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "recipes", sa.Column("search_vector", postgresql.TSVECTOR(), nullable=True)
+    )
+
+    # Weighted document: title (A), description (B), ingredient names (C)
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION recipes_build_search_vector(
+            p_title text, p_description text, p_recipe_id integer
+        ) RETURNS tsvector AS $$
+            SELECT setweight(to_tsvector('russian', coalesce(p_title, '')), 'A')
+                || setweight(to_tsvector('russian', coalesce(p_description, '')), 'B')
+                || setweight(to_tsvector('russian', coalesce(
+                       (SELECT string_agg(name, ' ') FROM recipe_ingredients
+                        WHERE recipe_id = p_recipe_id), '')), 'C')
+        $$ LANGUAGE sql STABLE
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION recipes_search_vector_row() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := recipes_build_search_vector(NEW.title, NEW.description, NEW.id);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_recipes_search_vector
+        BEFORE INSERT OR UPDATE OF title, description ON recipes
+        FOR EACH ROW EXECUTE FUNCTION recipes_search_vector_row()
+        """
+    )
+
+    # Ingredient changes refresh the parent recipe once per statement, so
+    # replace_ingredients does not update the recipe row per ingredient
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION recipe_ingredients_search_vector_stmt() RETURNS trigger AS $$
+        BEGIN
+            UPDATE recipes r
+            SET search_vector = recipes_build_search_vector(r.title, r.description, r.id)
+            WHERE r.id IN (SELECT DISTINCT recipe_id FROM changed_rows);
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_recipe_ingredients_search_vector_ins
+        AFTER INSERT ON recipe_ingredients REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION recipe_ingredients_search_vector_stmt()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_recipe_ingredients_search_vector_del
+        AFTER DELETE ON recipe_ingredients REFERENCING OLD TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION recipe_ingredients_search_vector_stmt()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_recipe_ingredients_search_vector_upd
+        AFTER UPDATE ON recipe_ingredients REFERENCING NEW TABLE AS changed_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION recipe_ingredients_search_vector_stmt()
+        """
+    )
+
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        max_id = conn.execute(sa.text("SELECT coalesce(max(id), 0) FROM recipes")).scalar()
+        for lo in range(0, max_id + 1, BATCH_SIZE):
+            conn.execute(
+                sa.text(
+                    """
+                    UPDATE recipes
+                    SET search_vector = recipes_build_search_vector(title, description, id)
+                    WHERE id >= :lo AND id < :hi
+                    """
+                ),
+                {"lo": lo, "hi": lo + BATCH_SIZE},
+            )
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_search_vector
+            ON recipes USING GIN (search_vector)
+            """
+        )
+        # Expression indexes from fts_20250819 never matched the query
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recipes_fts")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recipe_ingredients_fts")
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_recipes_fts ON recipes
+        USING GIN (to_tsvector('russian', coalesce(title,'') || ' ' || coalesce(description,'')))
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX IF NOT EXISTS ix_recipe_ingredients_fts ON recipe_ingredients
+        USING GIN (to_tsvector('russian', coalesce(name,'')))
+        """
+    )
+    op.execute("DROP INDEX IF EXISTS ix_recipes_search_vector")
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_recipe_ingredients_search_vector_upd ON recipe_ingredients"
+    )
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_recipe_ingredients_search_vector_del ON recipe_ingredients"
+    )
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_recipe_ingredients_search_vector_ins ON recipe_ingredients"
+    )
+    op.execute("DROP TRIGGER IF EXISTS trg_recipes_search_vector ON recipes")
+    op.execute("DROP FUNCTION IF EXISTS recipe_ingredients_search_vector_stmt()")
+    op.execute("DROP FUNCTION IF EXISTS recipes_search_vector_row()")
+    op.execute("DROP FUNCTION IF EXISTS recipes_build_search_vector(text, text, integer)")
+    op.drop_column("recipes", "search_vector")
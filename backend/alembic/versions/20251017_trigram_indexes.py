@@ -0,0 +1,39 @@
+"""trigram indexes for substring search
+
+Revision ID: trgm_20251017
+Revises: search_vector_20251017
+Create Date: 2025-10-17
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "trgm_20251017"
+down_revision = "search_vector_20251017"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY keeps writes to large tables going while the index builds;
+    # it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipes_title_trgm
+            ON recipes USING GIN (title gin_trgm_ops)
+            """
+        )
+        op.execute(
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recipe_ingredients_name_trgm
+            ON recipe_ingredients USING GIN (name gin_trgm_ops)
+            """
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recipe_ingredients_name_trgm")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_recipes_title_trgm")
@@ -0,0 +1,35 @@
+"""updated_at on recipes and comments (ETag versions)
+
+Revision ID: updated_at_20251017
+Revises: ingredients_20251017
+Create Date: 2025-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "updated_at_20251017"
+down_revision = "ingredients_20251017"
+branch_labels = None
+depends_on = None
+
+UTC_NOW = sa.text("timezone('utc', now())")
+
+
+def upgrade() -> None:
+    # now() is evaluated once for the ALTER, so PostgreSQL 11+ stores it as a
+    # fast default without rewriting the tables; existing rows simply share
+    # the migration timestamp as their first version
+    for table in ("recipes", "comments"):
+        op.add_column(
+            table,
+            sa.Column(
+                "updated_at", sa.DateTime(), nullable=False, server_default=UTC_NOW
+            ),
+        )
+
+
+def downgrade() -> None:
+    op.drop_column("comments", "updated_at")
+    op.drop_column("recipes", "updated_at")
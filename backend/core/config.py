@@ -27,6 +27,14 @@ class Settings(BaseSettings):
     mq_access_key_id: str
     mq_secret_access_key: str
     mq_queue_url: str
+    # "sqs" or "redis" (Redis Streams on redis_url), see services/mq_transport.py
+    mq_transport: str = "sqs"
+    mq_stream: str = "cookbook:mail"
+    mq_stream_group: str = "mail-workers"
+    mq_stream_maxlen: int = 100000
+    # Redis: entries delivered more times go to the "<mq_stream>:dead" stream
+    # (for SQS the same is the queue's redrive policy)
+    mq_max_deliveries: int = 5
 
     s3_endpoint: str
     s3_region: str
@@ -40,6 +48,48 @@ class Settings(BaseSettings):
     frontend_url: str
     reset_token_ttl_seconds: int
 
+    suggest_refresh_seconds: int = 300
+    topic_counts_ttl_seconds: int = 3600
+
+    # Presigned GET URLs: signature lifetime and the in-process cache of them.
+    # The cache TTL plus the ETag epoch (core.http_cache) must stay below
+    # the signature lifetime
+    s3_presign_expires_seconds: int = 3600
+    s3_presign_cache_ttl_seconds: int = 1500
+    s3_presign_cache_size: int = 10000
+    # Blocking boto3 calls run on a bounded thread pool, each with a deadline
+    s3_max_workers: int = 16
+    s3_timeout_seconds: float = 30.0
+    # Photos of one recipe uploaded at the same time
+    s3_upload_concurrency: int = 4
+    # Uploads are streamed; larger files switch to multipart with parallel parts
+    upload_max_bytes: int = 20 * 1024 * 1024
+    s3_multipart_threshold_bytes: int = 8 * 1024 * 1024
+    s3_multipart_chunk_bytes: int = 8 * 1024 * 1024
+    s3_multipart_concurrency: int = 4
+    # Lifetime of presigned POST policies for direct browser uploads
+    upload_presign_expires_seconds: int = 600
+    # Processes resizing uploaded photos (services/images.py)
+    image_workers: int = 2
+    # MQ worker: handler threads, SQS visibility lease and long-poll wait.
+    # Slow handlers get their lease renewed before half of it runs out
+    mq_worker_threads: int = 8
+    mq_visibility_timeout_seconds: int = 30
+    mq_wait_time_seconds: int = 10
+    # Outgoing SMTP: connections shared by sender threads. Idle connections
+    # are probed with NOOP before reuse and recycled after max_messages
+    smtp_pool_size: int = 8
+    smtp_max_messages_per_connection: int = 100
+    smtp_noop_after_seconds: float = 30.0
+    smtp_timeout_seconds: float = 30.0
+    # API-side mail events: bounded buffer flushed to SQS in batches of 10
+    mail_queue_max_size: int = 1000
+    mail_flush_linger_seconds: float = 0.05
+    mail_publish_retries: int = 3
+    # Without SQS the API process sends mail itself from background tasks
+    mail_delivery_concurrency: int = 4
+    mail_delivery_retries: int = 3
+
     class Config:
         env_file = ".env"
         case_sensitive = False
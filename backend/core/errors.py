@@ -17,6 +17,11 @@ class ErrorCode(str, Enum):
     NOT_AUTHENTICATED = "NOT_AUTHENTICATED"
     INVALID_TOKEN = "INVALID_TOKEN"
     FORBIDDEN = "FORBIDDEN"
+    INVALID_CURSOR = "INVALID_CURSOR"
+    STORAGE_TIMEOUT = "STORAGE_TIMEOUT"
+    FILE_TOO_LARGE = "FILE_TOO_LARGE"
+    INVALID_UPLOAD_KEY = "INVALID_UPLOAD_KEY"
+    MAIL_QUEUE_FULL = "MAIL_QUEUE_FULL"
 
 
 ERRORS: Dict[ErrorCode, Tuple[int, str]] = {
@@ -38,6 +43,23 @@ ERRORS: Dict[ErrorCode, Tuple[int, str]] = {
     ErrorCode.NOT_AUTHENTICATED: (status.HTTP_401_UNAUTHORIZED, "Not authenticated"),
     ErrorCode.INVALID_TOKEN: (status.HTTP_401_UNAUTHORIZED, "Invalid token"),
     ErrorCode.FORBIDDEN: (status.HTTP_403_FORBIDDEN, "Forbidden"),
+    ErrorCode.INVALID_CURSOR: (status.HTTP_400_BAD_REQUEST, "Invalid cursor"),
+    ErrorCode.STORAGE_TIMEOUT: (
+        status.HTTP_504_GATEWAY_TIMEOUT,
+        "File storage did not respond in time",
+    ),
+    ErrorCode.FILE_TOO_LARGE: (
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        "File is too large",
+    ),
+    ErrorCode.INVALID_UPLOAD_KEY: (
+        status.HTTP_400_BAD_REQUEST,
+        "Unknown or foreign upload key",
+    ),
+    ErrorCode.MAIL_QUEUE_FULL: (
+        status.HTTP_503_SERVICE_UNAVAILABLE,
+        "Mail service is busy, try again later",
+    ),
 }
 
 
@@ -0,0 +1,44 @@
+"""Условные GET: сильные ETag и 304 по If-None-Match."""
+
+import hashlib
+import time
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+# Presigned URL'ы в ответах живут s3_presign_expires_seconds (час) и берутся из
+# кэша не старше s3_presign_cache_ttl_seconds; ETag меняется каждые полчаса,
+# чтобы 304 не продлевал клиенту протухшие ссылки
+URL_EPOCH_SECONDS = 1800
+
+CACHE_HEADERS = {
+    "Cache-Control": "private, no-cache",
+    # liked_by_me / can_edit зависят от зрителя
+    "Vary": "Authorization",
+}
+
+
+def make_etag(*parts: Any) -> str:
+    raw = "|".join(str(p) for p in parts)
+    raw += f"|{int(time.time() // URL_EPOCH_SECONDS)}"
+    return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison (RFC 9110, 13.1.2)
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """304-ответ, если у клиента актуальная версия; иначе ставит ETag на response."""
+    headers = {"ETag": etag, **CACHE_HEADERS}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Sequence
+
+from backend.core.errors import ErrorCode, http_error
+
+MAX_PAGE_LIMIT = 100
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_LIMIT))
+
+
+def encode_cursor(kind: str, values: Sequence[Any]) -> str:
+    payload = {
+        "k": kind,
+        "v": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, *, kind: str, fields: Sequence[Callable[[Any], Any]]
+) -> tuple:
+    """Разбирает курсор, выданный encode_cursor для того же kind.
+
+    fields — конвертеры для каждого значения ключа (например, datetime.fromisoformat, int).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["v"]
+        if payload.get("k") != kind or len(values) != len(fields):
+            raise ValueError(cursor)
+        return tuple(convert(value) for convert, value in zip(fields, values))
+    except Exception:
+        raise http_error(ErrorCode.INVALID_CURSOR)
@@ -0,0 +1,40 @@
+import re
+
+_SPACES = re.compile(r"\s+")
+_WORDS = re.compile(r"\w+")
+# Падежные и числовые окончания, длинные раньше коротких
+_RU_ENDINGS = (
+    "ами", "ями", "ов", "ев", "ей", "ой", "ий", "ый", "ая", "яя", "ое", "ее",
+    "ые", "ие", "ам", "ям", "ах", "ях", "ом", "ем",
+    "а", "я", "ы", "и", "о", "е", "у", "ю", "ь", "й",
+)
+
+
+def normalize_term(value: str) -> str:
+    """Ключ для сравнения названий: нижний регистр, ё→е, схлопнутые пробелы."""
+    return _SPACES.sub(" ", value.strip().lower().replace("ё", "е"))
+
+
+def _stem(token: str) -> str:
+    # Грубое отсечение окончаний: "помидоры" ~ "помидор", "tomatoes" ~ "tomato"
+    if len(token) <= 3:
+        return token
+    if token.isascii():
+        if token.endswith("ies"):
+            return token[:-3] + "y"
+        if token.endswith("es"):
+            return token[:-2]
+        if token.endswith("s") and not token.endswith("ss"):
+            return token[:-1]
+        if token.endswith("e"):
+            return token[:-1]
+        return token
+    for ending in _RU_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= 3:
+            return token[: -len(ending)]
+    return token
+
+
+def term_tokens(value: str) -> frozenset[str]:
+    """Основы слов названия для сопоставления по токенам ("tomato" ~ "cherry tomatoes")."""
+    return frozenset(_stem(t) for t in _WORDS.findall(normalize_term(value)))
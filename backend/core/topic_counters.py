@@ -0,0 +1,70 @@
+from typing import Dict, Optional
+
+import redis.asyncio as aioredis
+
+from backend.core.config import get_settings
+
+# HINCRBY only when the hash exists: a missing hash means "rebuild from the DB",
+# and incrementing it would create a partial hash that looks complete
+_INCR_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+end
+return nil
+"""
+
+
+class TopicCounters:
+    """Число рецептов по темам для ленты без фильтров, в Redis-хэше.
+
+    Меняется при создании/удалении/смене темы рецепта; TTL — страховка от
+    расхождений (например, каскадного удаления рецептов вместе с автором).
+    """
+
+    KEY = "recipes:topic_counts"
+
+    def __init__(self) -> None:
+        s = get_settings()
+        self.ttl = s.topic_counts_ttl_seconds
+        self.redis: aioredis.Redis = aioredis.from_url(s.redis_url)
+
+    async def get(self) -> Optional[Dict[str, int]]:
+        raw = await self.redis.hgetall(self.KEY)
+        if not raw:
+            return None
+        return {k.decode(): int(v) for k, v in raw.items()}
+
+    async def replace(self, counts: Dict[str, int]) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.KEY)
+            pipe.hset(self.KEY, mapping=counts)
+            pipe.expire(self.KEY, self.ttl)
+            await pipe.execute()
+
+    async def incr(self, topic: str, delta: int) -> None:
+        await self.redis.eval(_INCR_IF_EXISTS, 1, self.KEY, topic, delta)
+
+
+_counters = TopicCounters()
+
+
+async def get_topic_counts() -> Optional[Dict[str, int]]:
+    try:
+        return await _counters.get()
+    except aioredis.RedisError:
+        return None
+
+
+async def set_topic_counts(counts: Dict[str, int]) -> None:
+    try:
+        await _counters.replace(counts)
+    except aioredis.RedisError:
+        pass
+
+
+async def incr_topic_count(topic: str, delta: int = 1) -> None:
+    try:
+        await _counters.incr(topic, delta)
+    except aioredis.RedisError:
+        # Stale counters expire by TTL; a failed increment must not fail the request
+        pass
@@ -1,14 +1,29 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.core.config import get_settings
 from backend.routers import auth as auth_router
 from backend.routers import recipes as recipes_router
+from backend.routers import uploads as uploads_router
 from backend.routers import users as users_router
+from backend.services import mail_queue
+from backend.services.email import close_smtp_pool
 
 settings = get_settings()
 
-app = FastAPI(title=settings.app_name)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mail_queue.start()
+    yield
+    # flush buffered mail events before the process exits
+    await mail_queue.stop()
+    close_smtp_pool()
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +36,7 @@ app.add_middleware(
 app.include_router(auth_router.router)
 app.include_router(users_router.router)
 app.include_router(recipes_router.router)
+app.include_router(uploads_router.router)
 
 
 @app.get("/")
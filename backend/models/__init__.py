@@ -1,7 +1,9 @@
 from .base import Base
 from .comment import Comment
 from .email_verification import EmailVerification
+from .ingredient import Ingredient
 from .like import Like
+from .pending_delete import PendingDelete
 from .recipe import Recipe, RecipeIngredient, RecipeStep
 from .user import User
 
@@ -9,9 +11,11 @@ __all__ = [
     "Base",
     "User",
     "Recipe",
+    "Ingredient",
     "RecipeIngredient",
     "RecipeStep",
     "Like",
     "Comment",
     "EmailVerification",
+    "PendingDelete",
 ]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, text
 from sqlalchemy.orm import relationship
 
 from backend.models.base import Base
@@ -21,6 +21,13 @@ class Comment(Base):
     )
     content = Column(String(1000), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=text("timezone('utc', now())"),
+        nullable=False,
+    )
 
     recipe = relationship("Recipe", lazy="selectin")
     author = relationship("User", lazy="selectin")
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String
+
+from backend.models.base import Base
+
+
+class Ingredient(Base):
+    """Каноничный ингредиент: нормализованное имя (core.text.normalize_term)."""
+
+    __tablename__ = "ingredients"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False, unique=True)
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+
+from backend.models.base import Base
+
+
+class PendingDelete(Base):
+    """S3-объект, который нужно удалить; разбирает workers/storage_sweeper."""
+
+    __tablename__ = "pending_deletes"
+
+    id = Column(Integer, primary_key=True)
+    key = Column(String(1024), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,8 +1,9 @@
 import enum
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from backend.models.base import Base
 
@@ -34,8 +35,24 @@ class Recipe(Base):
     description = Column(Text, nullable=True)
     topic = Column(Enum(TopicEnum), nullable=False, index=True)
     photo_path = Column(String(255), nullable=True)
+    # Widths of the resized copies of photo_path (services/images.py)
+    photo_widths = Column(ARRAY(Integer), nullable=True)
+    # Denormalized count of likes; maintained by RecipeRepository.toggle_like
+    likes_count = Column(Integer, default=0, server_default="0", nullable=False)
+    # Weighted title/description/ingredients document, kept up to date by
+    # database triggers (see the search_vector migration); never written here
+    search_vector = deferred(Column(TSVECTOR, nullable=True))
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Version for ETags: bumped on any change of the recipe row, its
+    # ingredients or steps (see RecipeRepository._touch)
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=text("timezone('utc', now())"),
+        nullable=False,
+    )
 
     author = relationship("User", back_populates="recipes", lazy="selectin")
     ingredients = relationship(
@@ -51,8 +68,14 @@ class Recipe(Base):
         lazy="selectin",
         order_by="RecipeStep.order_index",
     )
+    # Never read through the ORM (likes_count / liked_ids cover it); rows are
+    # removed by ON DELETE CASCADE instead of being loaded for every recipe
     likes = relationship(
-        "Like", back_populates="recipe", cascade="all, delete-orphan", lazy="selectin"
+        "Like",
+        back_populates="recipe",
+        cascade="all, delete-orphan",
+        lazy="noload",
+        passive_deletes=True,
     )
 
 
@@ -66,6 +89,10 @@ class RecipeIngredient(Base):
         nullable=False,
         index=True,
     )
+    ingredient_id = Column(
+        Integer, ForeignKey("ingredients.id"), nullable=False, index=True
+    )
+    # Name as the author typed it; ingredient_id points at the normalized entry
     name = Column(String(255), nullable=False)
     quantity = Column(String(255), nullable=False)
 
@@ -85,5 +112,6 @@ class RecipeStep(Base):
     order_index = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
     photo_path = Column(String(255), nullable=True)
+    photo_widths = Column(ARRAY(Integer), nullable=True)
 
     recipe = relationship("Recipe", back_populates="steps", lazy="selectin")
@@ -1,6 +1,7 @@
 from datetime import datetime
 
 from sqlalchemy import Boolean, Column, DateTime, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 
 from backend.models.base import Base
@@ -18,12 +19,26 @@ class User(Base):
     nickname = Column(String(50), nullable=True)
     full_name = Column(String(100), nullable=True)
     photo_path = Column(String(255), nullable=True)
+    # Widths of the resized copies of photo_path (services/images.py)
+    photo_widths = Column(ARRAY(Integer), nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
+    # Collections are never loaded implicitly: every request resolves the viewer
+    # and every recipe its author. Queries that need them add
+    # selectinload(User.recipes) / selectinload(User.likes) explicitly;
+    # rows are removed by ON DELETE CASCADE.
     recipes = relationship(
-        "Recipe", back_populates="author", cascade="all, delete-orphan", lazy="selectin"
+        "Recipe",
+        back_populates="author",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+        passive_deletes=True,
     )
     likes = relationship(
-        "Like", back_populates="user", cascade="all, delete-orphan", lazy="selectin"
+        "Like",
+        back_populates="user",
+        cascade="all, delete-orphan",
+        lazy="raise_on_sql",
+        passive_deletes=True,
     )
@@ -1,6 +1,7 @@
 from typing import Generic, TypeVar, Type, Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import func, literal, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 
 from backend.models.base import Base
 
@@ -36,4 +37,17 @@ class CRUDRepository(Generic[ModelT]):
 
     async def delete(self, obj: ModelT) -> None:
         await self.db.delete(obj)
-        await self.db.commit()
\ No newline at end of file
+        await self.db.commit()
+
+    async def _page_digest(self, stmt) -> tuple[int, str]:
+        """Число строк и md5 по всем колонкам страницы stmt (должна быть колонка id).
+
+        Один запрос по тем же индексам, что и сама страница, без загрузки объектов.
+        """
+        page = stmt.subquery()
+        row = func.concat_ws(":", *page.c)
+        digest = func.md5(func.string_agg(row, aggregate_order_by(literal(","), page.c.id)))
+        count, value = (
+            await self.db.execute(select(func.count(), digest).select_from(page))
+        ).one()
+        return count, value or ""
\ No newline at end of file
@@ -3,7 +3,7 @@ from typing import List, Optional
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.models import Comment
+from backend.models import Comment, User
 from backend.repositories.base import CRUDRepository
 
 
@@ -13,11 +13,35 @@ class CommentRepository(CRUDRepository[Comment]):
     async def list_for_recipe(
         self, *, recipe_id: int, limit: int = 50, offset: int = 0
     ) -> List[Comment]:
-        stmt = (
-            select(Comment)
-            .where(Comment.recipe_id == recipe_id)
+        stmt = self._page_stmt(
+            select(Comment), recipe_id=recipe_id, limit=limit, offset=offset
+        )
+        return list((await self.db.scalars(stmt)).all())
+
+    async def page_version(
+        self, *, recipe_id: int, limit: int = 50, offset: int = 0
+    ) -> tuple[int, str]:
+        """Версия страницы комментариев для ETag (см. _page_digest)."""
+        stmt = self._page_stmt(
+            select(
+                Comment.id,
+                Comment.updated_at,
+                User.email,
+                User.nickname,
+                User.photo_path,
+                User.photo_widths,
+            ).join(User, User.id == Comment.author_id),
+            recipe_id=recipe_id,
+            limit=limit,
+            offset=offset,
+        )
+        return await self._page_digest(stmt)
+
+    @staticmethod
+    def _page_stmt(stmt, *, recipe_id: int, limit: int, offset: int):
+        return (
+            stmt.where(Comment.recipe_id == recipe_id)
             .order_by(Comment.created_at.asc())
             .offset(offset)
             .limit(limit)
         )
-        return list((await self.db.scalars(stmt)).all())
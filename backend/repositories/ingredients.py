@@ -0,0 +1,64 @@
+from typing import Dict, Iterable
+
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from backend.core.text import normalize_term
+from backend.models import Ingredient
+from backend.repositories.base import CRUDRepository
+
+# Нормализованное имя -> id. Словарь только растёт и невелик, поэтому кэш общий
+# на процесс и без вытеснения; в него попадают только закоммиченные строки.
+_ids_by_name: Dict[str, int] = {}
+
+# Session.info key: ids inserted by the current transaction, cached on commit
+_PENDING_KEY = "pending_ingredient_ids"
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_ids(session: Session) -> None:
+    _ids_by_name.update(session.info.pop(_PENDING_KEY, {}))
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending_ids(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class IngredientRepository(CRUDRepository[Ingredient]):
+    model = Ingredient
+
+    async def lookup_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """id известных ингредиентов по именам (ключ — нормализованное имя)."""
+        keys = {normalize_term(n) for n in names} - {""}
+        missing = [k for k in keys if k not in _ids_by_name]
+        if missing:
+            stmt = select(Ingredient.name, Ingredient.id).where(
+                Ingredient.name.in_(missing)
+            )
+            _ids_by_name.update((await self.db.execute(stmt)).tuples().all())
+        return {k: _ids_by_name[k] for k in keys if k in _ids_by_name}
+
+    async def resolve_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """Как lookup_ids, но недостающие ингредиенты создаются.
+
+        Вставка идёт в транзакции вызывающего кода (без commit): новые id
+        попадают в кэш процесса только после её коммита, при откате — нет.
+        """
+        names = list(names)
+        known = await self.lookup_ids(names)
+        missing = {normalize_term(n) for n in names} - {""} - known.keys()
+        if missing:
+            await self.db.execute(
+                pg_insert(Ingredient)
+                .values([{"name": k} for k in sorted(missing)])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            stmt = select(Ingredient.name, Ingredient.id).where(
+                Ingredient.name.in_(missing)
+            )
+            created = dict((await self.db.execute(stmt)).tuples().all())
+            self.db.info.setdefault(_PENDING_KEY, {}).update(created)
+            known.update(created)
+        return known
@@ -0,0 +1,60 @@
+from typing import Iterable, List, Sequence
+
+from sqlalchemy import delete, or_, select, union
+
+from backend.models import PendingDelete, Recipe, RecipeStep, User
+from backend.repositories.base import CRUDRepository
+
+
+class PendingDeleteRepository(CRUDRepository[PendingDelete]):
+    model = PendingDelete
+
+    def add_keys(self, keys: Iterable[str]) -> None:
+        """Ставит объекты в очередь на удаление в текущей транзакции.
+
+        Без commit: запись попадает в БД вместе с изменением, из-за
+        которого объект стал не нужен (удаление рецепта, смена аватара).
+        """
+        self.db.add_all([PendingDelete(key=key) for key in keys if key])
+
+    async def claim_batch(self, limit: int) -> List[PendingDelete]:
+        """Пачка строк под блокировкой; параллельные sweeper'ы берут разные."""
+        stmt = (
+            select(PendingDelete)
+            .order_by(PendingDelete.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        return list((await self.db.scalars(stmt)).all())
+
+    async def remove(self, ids: Iterable[int]) -> None:
+        ids = list(ids)
+        if ids:
+            await self.db.execute(delete(PendingDelete).where(PendingDelete.id.in_(ids)))
+
+    async def in_use(self, keys: Sequence[str], urls: Sequence[str]) -> bool:
+        """Ссылается ли на объекты строка рецепта, шага или пользователя,
+        или объект уже стоит в очереди на удаление."""
+        if not keys:
+            return False
+        stmt = select(
+            or_(
+                select(Recipe.id).where(Recipe.photo_path.in_(urls)).exists(),
+                select(RecipeStep.id).where(RecipeStep.photo_path.in_(urls)).exists(),
+                select(User.id).where(User.photo_path.in_(urls)).exists(),
+                select(PendingDelete.id).where(PendingDelete.key.in_(keys)).exists(),
+            )
+        )
+        return bool(await self.db.scalar(stmt))
+
+    async def queued_keys(self) -> set[str]:
+        return set((await self.db.scalars(select(PendingDelete.key))).all())
+
+    async def referenced_urls(self) -> set[str]:
+        """Все photo_path, на которые ссылаются рецепты, шаги и пользователи."""
+        stmt = union(
+            select(Recipe.photo_path).where(Recipe.photo_path.is_not(None)),
+            select(RecipeStep.photo_path).where(RecipeStep.photo_path.is_not(None)),
+            select(User.photo_path).where(User.photo_path.is_not(None)),
+        )
+        return set((await self.db.scalars(stmt)).all())
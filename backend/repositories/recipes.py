@@ -1,10 +1,101 @@
-from typing import Iterable, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
 
-from sqlalchemy import delete, exists, func, or_, select
+from sqlalchemy import delete, func, literal, or_, select, tuple_, union, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from backend.models import Like, Recipe, RecipeIngredient, RecipeStep
+from backend.core.text import normalize_term
+from backend.models import (
+    Ingredient,
+    Like,
+    Recipe,
+    RecipeIngredient,
+    RecipeStep,
+    User,
+)
 from backend.models.recipe import TopicEnum
 from backend.repositories.base import CRUDRepository
+from backend.repositories.ingredients import IngredientRepository
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _search_condition(q_clean: str):
+    # Full-text search по заголовку, описанию и ингредиентам (GIN по search_vector)
+    query = func.plainto_tsquery("russian", q_clean)
+    cond_fts = Recipe.search_vector.op("@@")(query)
+
+    # ILIKE поиск - только по заголовку и ингредиентам (trigram GIN-индексы)
+    pattern = f"%{_escape_like(q_clean)}%"
+    ilike_title = Recipe.title.ilike(pattern, escape="\\")
+    # Ингредиенты ищем по небольшому словарю, а к рецептам идём по integer-ключу
+    ingredient_ids = select(Ingredient.id).where(
+        Ingredient.name.ilike(f"%{_escape_like(normalize_term(q_clean))}%", escape="\\")
+    )
+
+    # Обе ветки по recipes в одном WHERE дают BitmapOr двух индексов,
+    # ингредиенты идут отдельной веткой UNION вместо коррелированного EXISTS
+    matched_ids = union(
+        select(Recipe.id).where(or_(cond_fts, ilike_title)).correlate(None),
+        select(RecipeIngredient.recipe_id).where(
+            RecipeIngredient.ingredient_id.in_(ingredient_ids)
+        ),
+    )
+    return Recipe.id.in_(matched_ids)
+
+
+def _html_escape(expr):
+    return func.replace(
+        func.replace(func.replace(expr, "&", "&amp;"), "<", "&lt;"), ">", "&gt;"
+    )
+
+
+def _summary_select():
+    """Только колонки карточки рецепта, автор и число ингредиентов — без графа ORM."""
+    ingredients_count = (
+        select(func.count(RecipeIngredient.id))
+        .where(RecipeIngredient.recipe_id == Recipe.id)
+        .correlate(Recipe)
+        .scalar_subquery()
+    )
+    return select(
+        Recipe.id,
+        Recipe.author_id,
+        Recipe.title,
+        Recipe.topic,
+        Recipe.photo_path,
+        Recipe.photo_widths,
+        Recipe.created_at,
+        Recipe.likes_count,
+        User.email.label("author_email"),
+        User.nickname.label("author_nickname"),
+        User.photo_path.label("author_photo_path"),
+        User.photo_widths.label("author_photo_widths"),
+        ingredients_count.label("ingredients_count"),
+    ).join(User, User.id == Recipe.author_id)
+
+
+def _version_select(user_id: Optional[int]):
+    """Всё, от чего зависит карточка/деталь рецепта для данного зрителя."""
+    columns = [
+        Recipe.id,
+        Recipe.updated_at,
+        Recipe.likes_count,
+        User.email,
+        User.nickname,
+        User.photo_path,
+        User.photo_widths,
+    ]
+    if user_id:
+        liked = (
+            select(Like.id)
+            .where(Like.user_id == user_id, Like.recipe_id == Recipe.id)
+            .exists()
+        )
+        columns.append(liked.label("liked"))
+    return select(*columns).join(User, User.id == Recipe.author_id)
 
 
 class RecipeRepository(CRUDRepository[Recipe]):
@@ -18,80 +109,239 @@ class RecipeRepository(CRUDRepository[Recipe]):
         offset: int,
         order: str = "desc",
         q: Optional[str] = None,
-    ) -> List[Recipe]:
-        stmt = select(Recipe)
+        after: Optional[tuple[datetime, int]] = None,
+        summary: bool = False,
+    ) -> List[Any]:
+        """Лента рецептов.
+
+        after — ключ (created_at, id) последней строки предыдущей страницы;
+        если передан, offset игнорируется (keyset-пагинация).
+        summary=True — строки _summary_select вместо объектов Recipe.
+        """
+        stmt = self._feed_stmt(
+            _summary_select() if summary else select(Recipe),
+            topic=topic,
+            limit=limit,
+            offset=offset,
+            order=order,
+            q=q,
+            after=after,
+        )
+        if stmt is None:
+            return []
+        return await self._fetch(stmt, summary=summary)
+
+    async def feed_version(
+        self,
+        *,
+        topic: Optional[TopicEnum],
+        limit: int,
+        offset: int,
+        order: str = "desc",
+        after: Optional[tuple[datetime, int]] = None,
+        user_id: Optional[int] = None,
+    ) -> tuple[int, str]:
+        """Версия страницы ленты для ETag (см. _page_digest)."""
+        stmt = self._feed_stmt(
+            _version_select(user_id),
+            topic=topic,
+            limit=limit,
+            offset=offset,
+            order=order,
+            after=after,
+        )
+        return await self._page_digest(stmt)
+
+    @staticmethod
+    def _feed_stmt(
+        stmt,
+        *,
+        topic: Optional[TopicEnum],
+        limit: int,
+        offset: int,
+        order: str = "desc",
+        q: Optional[str] = None,
+        after: Optional[tuple[datetime, int]] = None,
+    ):
         if topic is not None:
             stmt = stmt.where(Recipe.topic == topic)
         if q:
             # Очищаем запрос от лишних символов
             q_clean = q.strip()
             if not q_clean:
-                return []
-            
-            # Full-text search по заголовку и описанию
-            query = func.plainto_tsquery("russian", q_clean)
-            tsv_recipe = func.to_tsvector(
-                "russian",
-                func.concat_ws(
-                    " ",
-                    func.coalesce(Recipe.title, ""),
-                    func.coalesce(Recipe.description, ""),
-                ),
-            )
-            cond_recipe = tsv_recipe.op("@@")(query)
+                return None
+            stmt = stmt.where(_search_condition(q_clean))
+        key = tuple_(Recipe.created_at, Recipe.id)
+        if (order or "").lower() == "asc":
+            if after is not None:
+                stmt = stmt.where(key > tuple_(*after))
+            stmt = stmt.order_by(Recipe.created_at.asc(), Recipe.id.asc())
+        else:
+            if after is not None:
+                stmt = stmt.where(key < tuple_(*after))
+            stmt = stmt.order_by(Recipe.created_at.desc(), Recipe.id.desc())
+        if after is None:
+            stmt = stmt.offset(offset)
+        return stmt.limit(limit)
 
-            # Full-text search по ингредиентам
-            tsv_ing = func.to_tsvector(
-                "russian", func.coalesce(RecipeIngredient.name, "")
-            )
-            cond_ing = exists(
-                select(1)
-                .select_from(RecipeIngredient)
-                .where(RecipeIngredient.recipe_id == Recipe.id)
-                .where(tsv_ing.op("@@")(query))
-            )
+    async def _fetch(self, stmt, *, summary: bool) -> List[Any]:
+        if summary:
+            return list((await self.db.execute(stmt)).all())
+        return list((await self.db.scalars(stmt)).all())
 
-            # ILIKE поиск - только по заголовку и ингредиентам (убрали описание и шаги для более точного поиска)
-            ilike_title = Recipe.title.ilike(f"%{q_clean}%")
-            ilike_ing = exists(
-                select(1)
-                .select_from(RecipeIngredient)
-                .where(RecipeIngredient.recipe_id == Recipe.id)
-                .where(RecipeIngredient.name.ilike(f"%{q_clean}%"))
-            )
+    async def search_ranked(
+        self,
+        *,
+        topic: Optional[TopicEnum],
+        q: str,
+        limit: int,
+        offset: int,
+        after: Optional[tuple[float, int]] = None,
+        summary: bool = False,
+    ) -> List[tuple[Any, float, str]]:
+        """Поиск по релевантности: (рецепт, ts_rank_cd, сниппет) одним запросом.
 
-            search_condition = or_(
-                cond_recipe,  # Full-text по заголовку/описанию
-                cond_ing,     # Full-text по ингредиентам
-                ilike_title,  # ILIKE по заголовку
-                ilike_ing,    # ILIKE по ингредиентам
-            )
+        after — ключ (rank, id) последней строки предыдущей страницы.
+        summary=True — вместо Recipe строка _summary_select.
+        Сниппет — ts_headline описания с совпадениями в <mark>…</mark>,
+        остальной текст HTML-экранирован.
+        """
+        q_clean = q.strip()
+        if not q_clean:
+            return []
+        query = func.plainto_tsquery("russian", q_clean)
+        rank = func.ts_rank_cd(Recipe.search_vector, query)
 
-            stmt = stmt.where(search_condition)
-        if (order or "").lower() == "asc":
-            stmt = stmt.order_by(Recipe.created_at.asc())
+        # Сначала страница id по рангу, затем ts_headline только для неё
+        page = select(Recipe.id, rank.label("rank")).where(_search_condition(q_clean))
+        if topic is not None:
+            page = page.where(Recipe.topic == topic)
+        if after is not None:
+            page = page.where(tuple_(rank, Recipe.id) < tuple_(*after))
         else:
-            stmt = stmt.order_by(Recipe.created_at.desc())
-        stmt = stmt.offset(offset).limit(limit)
-        return list((await self.db.scalars(stmt)).all())
+            page = page.offset(offset)
+        page = (
+            page.order_by(rank.desc(), Recipe.id.desc()).limit(limit).subquery()
+        )
 
-    async def popular(self, *, limit: int, offset: int) -> List[Recipe]:
-        subq = (
-            select(Like.recipe_id, func.count(Like.id).label("likes"))
-            .group_by(Like.recipe_id)
-            .subquery()
+        snippet = func.ts_headline(
+            "russian",
+            _html_escape(func.coalesce(Recipe.description, Recipe.title)),
+            query,
+            "StartSel=<mark>, StopSel=</mark>, MaxWords=25, MinWords=10, MaxFragments=2",
         )
-        stmt = (
-            select(Recipe)
-            .outerjoin(subq, Recipe.id == subq.c.recipe_id)
-            .order_by(func.coalesce(subq.c.likes, 0).desc(), Recipe.created_at.desc())
-            .offset(offset)
-            .limit(limit)
+        if summary:
+            base = _summary_select().add_columns(
+                page.c.rank.label("rank"), snippet.label("snippet")
+            )
+        else:
+            base = select(Recipe, page.c.rank, snippet)
+        stmt = base.join(page, page.c.id == Recipe.id).order_by(
+            page.c.rank.desc(), Recipe.id.desc()
         )
-        return list((await self.db.scalars(stmt)).all())
+        rows = (await self.db.execute(stmt)).all()
+        if summary:
+            return [(row, row.rank, row.snippet) for row in rows]
+        return [(recipe, rank_value, text) for recipe, rank_value, text in rows]
+
+    async def suggest_terms(self) -> List[tuple[str, str]]:
+        """Все различные названия рецептов и ингредиентов: (kind, text)."""
+        titles = select(literal("title"), Recipe.title).distinct()
+        names = select(literal("ingredient"), Ingredient.name)
+        rows = (await self.db.execute(union(titles, names))).all()
+        return [(kind, text) for kind, text in rows]
+
+    async def ingredient_names(self) -> List[tuple[int, int, str]]:
+        """Все тройки (recipe_id, ingredient_id, нормализованное имя ингредиента)."""
+        stmt = select(
+            RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, Ingredient.name
+        ).join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+        return list((await self.db.execute(stmt)).tuples().all())
+
+    async def get_many(self, recipe_ids: Iterable[int]) -> dict[int, Recipe]:
+        ids = list(set(recipe_ids))
+        if not ids:
+            return {}
+        stmt = select(Recipe).where(Recipe.id.in_(ids))
+        return {r.id: r for r in (await self.db.scalars(stmt)).all()}
+
+    async def topic_counts(self, *, q: Optional[str] = None) -> dict[str, int]:
+        """Число рецептов по темам (для q — по результатам поиска), один GROUP BY."""
+        counts = {t.value: 0 for t in TopicEnum}
+        stmt = select(Recipe.topic, func.count(Recipe.id)).group_by(Recipe.topic)
+        if q is not None:
+            q_clean = q.strip()
+            if not q_clean:
+                return counts
+            stmt = stmt.where(_search_condition(q_clean))
+        for topic, count in (await self.db.execute(stmt)).all():
+            counts[topic.value] = count
+        return counts
+
+    async def popular(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: Optional[tuple[int, datetime, int]] = None,
+        summary: bool = False,
+    ) -> List[Any]:
+        """Рецепты по убыванию лайков.
+
+        after — ключ (likes, created_at, id) последней строки предыдущей страницы.
+        """
+        stmt = self._popular_stmt(
+            _summary_select() if summary else select(Recipe),
+            limit=limit,
+            offset=offset,
+            after=after,
+        )
+        return await self._fetch(stmt, summary=summary)
+
+    async def popular_version(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: Optional[tuple[int, datetime, int]] = None,
+        user_id: Optional[int] = None,
+    ) -> tuple[int, str]:
+        """Версия страницы популярных для ETag."""
+        stmt = self._popular_stmt(
+            _version_select(user_id), limit=limit, offset=offset, after=after
+        )
+        return await self._page_digest(stmt)
+
+    @staticmethod
+    def _popular_stmt(
+        stmt,
+        *,
+        limit: int,
+        offset: int,
+        after: Optional[tuple[int, datetime, int]] = None,
+    ):
+        stmt = stmt.order_by(
+            Recipe.likes_count.desc(), Recipe.created_at.desc(), Recipe.id.desc()
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(Recipe.likes_count, Recipe.created_at, Recipe.id)
+                < tuple_(*after)
+            )
+        else:
+            stmt = stmt.offset(offset)
+        return stmt.limit(limit)
+
+    async def version(self, recipe_id: int, *, user_id: Optional[int] = None):
+        """Версия одного рецепта для ETag: строка по PK без загрузки связей.
+
+        None — рецепта нет.
+        """
+        stmt = _version_select(user_id).where(Recipe.id == recipe_id)
+        return (await self.db.execute(stmt)).first()
 
     async def likes_count(self, recipe_id: int) -> int:
-        stmt = select(func.count(Like.id)).where(Like.recipe_id == recipe_id)
+        stmt = select(Recipe.likes_count).where(Recipe.id == recipe_id)
         return (await self.db.scalar(stmt)) or 0
 
     async def liked_by_user(
@@ -102,54 +352,181 @@ class RecipeRepository(CRUDRepository[Recipe]):
         stmt = select(Like).where(Like.user_id == user_id, Like.recipe_id == recipe_id)
         return (await self.db.scalars(stmt)).first() is not None
 
+    async def liked_ids(
+        self, recipe_ids: Iterable[int], *, user_id: Optional[int]
+    ) -> Optional[set[int]]:
+        """Какие из рецептов лайкнул пользователь — одним запросом на пачку.
+
+        Возвращает None, если пользователь не передан.
+        """
+        if not user_id:
+            return None
+        ids = list(set(recipe_ids))
+        if not ids:
+            return set()
+        stmt = select(Like.recipe_id).where(
+            Like.user_id == user_id, Like.recipe_id.in_(ids)
+        )
+        return set((await self.db.scalars(stmt)).all())
+
     async def toggle_like(self, *, user_id: int, recipe_id: int) -> tuple[bool, int]:
-        stmt = select(Like).where(Like.user_id == user_id, Like.recipe_id == recipe_id)
-        existing = (await self.db.scalars(stmt)).first()
-        if existing:
-            await self.db.delete(existing)
-            liked = False
+        # Like row and counter change in one transaction; the unique constraint
+        # keeps concurrent double-clicks from counting twice.
+        removed = await self.db.scalar(
+            delete(Like)
+            .where(Like.user_id == user_id, Like.recipe_id == recipe_id)
+            .returning(Like.id)
+        )
+        if removed is not None:
+            liked, delta = False, -1
         else:
-            self.db.add(Like(user_id=user_id, recipe_id=recipe_id))
-            liked = True
+            inserted = await self.db.scalar(
+                pg_insert(Like)
+                .values(user_id=user_id, recipe_id=recipe_id)
+                .on_conflict_do_nothing(constraint="uq_like_user_recipe")
+                .returning(Like.id)
+            )
+            liked, delta = True, (1 if inserted is not None else 0)
+        likes = await self.db.scalar(
+            update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(likes_count=Recipe.likes_count + delta)
+            .returning(Recipe.likes_count)
+        )
         await self.db.commit()
-        return liked, await self.likes_count(recipe_id)
+        return liked, likes or 0
 
-    async def list_by_author(self, *, author_id: int) -> List[Recipe]:
+    async def recount_likes(self, *, batch_size: int = 1000) -> int:
+        """Пересчитывает likes_count по таблице likes пачками по id.
+
+        Возвращает число исправленных рецептов.
+        """
+        max_id = (await self.db.scalar(select(func.max(Recipe.id)))) or 0
+        actual = (
+            select(func.count(Like.id))
+            .where(Like.recipe_id == Recipe.id)
+            .scalar_subquery()
+        )
+        fixed = 0
+        for lo in range(0, max_id + 1, batch_size):
+            result = await self.db.execute(
+                update(Recipe)
+                .where(
+                    Recipe.id >= lo,
+                    Recipe.id < lo + batch_size,
+                    Recipe.likes_count != actual,
+                )
+                .values(likes_count=actual)
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+            fixed += result.rowcount or 0
+        return fixed
+
+    async def list_by_author(
+        self, *, author_id: int, summary: bool = False
+    ) -> List[Any]:
         stmt = (
-            select(Recipe)
+            (_summary_select() if summary else select(Recipe))
             .where(Recipe.author_id == author_id)
             .order_by(Recipe.created_at.desc())
         )
-        return list((await self.db.scalars(stmt)).all())
+        return await self._fetch(stmt, summary=summary)
 
-    async def delete_by_author(self, *, recipe_id: int, author_id: int) -> bool:
-        recipe = await self.db.get(Recipe, recipe_id)
-        if not recipe or recipe.author_id != author_id:
-            return False
-        await self.db.delete(recipe)
-        await self.db.commit()
-        return True
+    async def delete_by_author(
+        self, *, recipe_id: int, author_id: int
+    ) -> Optional[tuple[TopicEnum, List[str]]]:
+        """Удаляет рецепт автора одним DELETE ... RETURNING, без загрузки графа.
+
+        Возвращает (topic, фото обложки и шагов) или None, если рецепта нет
+        или он чужой. Без commit: вызывающий код коммитит вместе с очередью
+        удаления файлов. Ингредиенты, шаги, лайки и комментарии удаляет
+        ON DELETE CASCADE.
+        """
+        step_photos = (
+            await self.db.scalars(
+                select(RecipeStep.photo_path).where(
+                    RecipeStep.recipe_id == recipe_id,
+                    RecipeStep.photo_path.is_not(None),
+                )
+            )
+        ).all()
+        row = (
+            await self.db.execute(
+                delete(Recipe)
+                .where(Recipe.id == recipe_id, Recipe.author_id == author_id)
+                .returning(Recipe.topic, Recipe.photo_path)
+            )
+        ).first()
+        if row is None:
+            return None
+        topic, photo_path = row
+        return topic, [p for p in (photo_path, *step_photos) if p]
+
+    async def _touch(self, recipe_id: int) -> None:
+        # Ingredients and steps live in their own tables; bump the recipe
+        # version so cached ETags of the detail and feed pages change too
+        await self.db.execute(
+            update(Recipe)
+            .where(Recipe.id == recipe_id)
+            .values(updated_at=datetime.utcnow())
+        )
 
     async def add_ingredients(
         self, recipe_id: int, items: Iterable[tuple[str, str]]
-    ) -> None:
-        for name, quantity in items:
-            self.db.add(
-                RecipeIngredient(recipe_id=recipe_id, name=name, quantity=quantity)
-            )
+    ) -> Dict[str, int]:
+        """Добавляет ингредиенты, сопоставляя имена со словарём ingredients.
+
+        Возвращает словарные ингредиенты рецепта: нормализованное имя -> id.
+        """
+        items = list(items)
+        ids = await IngredientRepository(self.db).resolve_ids(n for n, _ in items)
+        self._add_ingredient_rows(recipe_id, items, ids)
+        await self._touch(recipe_id)
         await self.db.commit()
+        return ids
 
     async def replace_ingredients(
         self, recipe_id: int, items: Iterable[tuple[str, str]]
-    ) -> None:
+    ) -> Dict[str, int]:
+        items = list(items)
+        ids = await IngredientRepository(self.db).resolve_ids(n for n, _ in items)
         await self.db.execute(
             delete(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id)
         )
-        await self.add_ingredients(recipe_id, items)
+        self._add_ingredient_rows(recipe_id, items, ids)
+        await self._touch(recipe_id)
+        await self.db.commit()
+        return ids
+
+    def _add_ingredient_rows(
+        self,
+        recipe_id: int,
+        items: List[tuple[str, str]],
+        ids: dict[str, int],
+    ) -> None:
+        for name, quantity in items:
+            ingredient_id = ids.get(normalize_term(name))
+            if ingredient_id is None:
+                continue
+            self.db.add(
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    name=name,
+                    quantity=quantity,
+                )
+            )
 
     async def set_steps(
-        self, recipe_id: int, steps: Iterable[tuple[int, str, str | None]]
+        self,
+        recipe_id: int,
+        steps: Iterable[tuple[int, str, str | None]],
+        *,
+        photo_widths: Optional[dict[str, List[int]]] = None,
     ) -> None:
+        """Перезаписывает шаги. photo_widths — готовые копии сохранённых фото по URL."""
+        photo_widths = photo_widths or {}
         await self.db.execute(delete(RecipeStep).where(RecipeStep.recipe_id == recipe_id))
         for order_index, text, photo_path in steps:
             self.db.add(
@@ -158,6 +535,25 @@ class RecipeRepository(CRUDRepository[Recipe]):
                     order_index=order_index,
                     text=text,
                     photo_path=photo_path,
+                    photo_widths=photo_widths.get(photo_path) if photo_path else None,
                 )
             )
+        await self._touch(recipe_id)
+        await self.db.commit()
+
+    async def set_photo_widths(
+        self, recipe_id: int, url: str, widths: List[int]
+    ) -> None:
+        """Отмечает готовые копии фото (обложки или шага), если оно ещё на месте."""
+        await self.db.execute(
+            update(Recipe)
+            .where(Recipe.id == recipe_id, Recipe.photo_path == url)
+            .values(photo_widths=widths)
+        )
+        await self.db.execute(
+            update(RecipeStep)
+            .where(RecipeStep.recipe_id == recipe_id, RecipeStep.photo_path == url)
+            .values(photo_widths=widths)
+        )
+        await self._touch(recipe_id)
         await self.db.commit()
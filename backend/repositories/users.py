@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import raiseload
 
 from backend.models import User
 from backend.repositories.base import CRUDRepository
@@ -12,3 +13,17 @@ class UserRepository(CRUDRepository[User]):
     async def get_by_email(self, email: str) -> Optional[User]:
         stmt = select(User).where(func.lower(User.email) == email.lower())
         return await self.db.scalar(stmt)
+
+    async def get_lean(self, user_id: int) -> Optional[User]:
+        """Только строка users — для авторизации на каждом запросе."""
+        stmt = select(User).where(User.id == user_id).options(raiseload("*"))
+        return await self.db.scalar(stmt)
+
+    async def set_photo_widths(self, user_id: int, url: str, widths: List[int]) -> None:
+        """Отмечает готовые копии аватара, если он не сменился за время обработки."""
+        await self.db.execute(
+            update(User)
+            .where(User.id == user_id, User.photo_path == url)
+            .values(photo_widths=widths)
+        )
+        await self.db.commit()
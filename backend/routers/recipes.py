@@ -1,18 +1,41 @@
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.core.http_cache import not_modified
 from backend.db.session import get_db
 from backend.models import User
 from backend.models.recipe import TopicEnum
 from backend.schemas.common import LikeResponse
-from backend.schemas.recipe import CommentPublic, RecipePublic
+from backend.schemas.recipe import (
+    CommentPublic,
+    CookableRecipe,
+    RecipePage,
+    RecipePublic,
+    RecipeSummary,
+    SuggestItem,
+)
 from backend.services import app_recipes as svc
 from backend.services.deps import get_current_user, get_current_user_optional
 
 router = APIRouter(prefix="/recipes", tags=["recipes"])
 
+CURSOR_DESCRIPTION = (
+    "Keyset-пагинация: пустое значение — первая страница, далее next_cursor "
+    "из предыдущего ответа. В этом режиме ответ — {items, next_cursor}"
+)
+VIEW_DESCRIPTION = (
+    "summary — облегчённые карточки (без описания, шагов и ингредиентов, "
+    "с ingredients_count); по умолчанию full"
+)
+
+PHOTO_KEY_DESCRIPTION = (
+    "Ключ обложки, загруженной через /uploads/presign (вместо файла photo)"
+)
+
+RecipeList = Union[List[RecipePublic], List[RecipeSummary], RecipePage]
+
 
 @router.post("/", response_model=RecipePublic)
 async def create_recipe(
@@ -23,8 +46,12 @@ async def create_recipe(
     ingredients: str = Form(..., description="JSON list of {name, quantity}"),
     steps: Optional[str] = Form(
         default=None,
-        description="JSON list of {text}. Files in step_photos[] map by index",
+        description=(
+            "JSON list of {text, with_file?, photo_key?}. Files in step_photos[] "
+            "map by index; photo_key — key from /uploads/presign"
+        ),
     ),
+    photo_key: Optional[str] = Form(default=None, description=PHOTO_KEY_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> RecipePublic:
@@ -32,6 +59,7 @@ async def create_recipe(
 
     - Поля: title, description?, topic, ingredients(JSON), steps(JSON)
     - Файлы: photo?, step_photos[]
+    - Или без файлов: photo_key и steps[].photo_key из /uploads/presign
     """
     return await svc.create_from_request(
         db,
@@ -42,25 +70,41 @@ async def create_recipe(
         topic=topic,
         ingredients=ingredients,
         steps=steps,
+        photo_key=photo_key,
     )
 
 
-@router.get("/", response_model=List[RecipePublic])
+@router.get("/", response_model=RecipeList)
 async def list_recipes(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
     topic: Optional[TopicEnum] = None,
     order: Optional[str] = None,
     q: Optional[str] = None,
+    sort: Optional[str] = Query(
+        default=None,
+        description="relevance — по релевантности запроса q (со сниппетами)",
+    ),
     limit: int = 20,
     offset: int = 0,
-) -> List[RecipePublic]:
+    cursor: Optional[str] = Query(default=None, description=CURSOR_DESCRIPTION),
+    facets: Optional[Literal["topic"]] = Query(
+        default=None,
+        description="topic — счётчики по темам для текущего q; ответ — {items, facets}",
+    ),
+    view: Literal["full", "summary"] = Query(default="full", description=VIEW_DESCRIPTION),
+) -> RecipeList:
     """Лента рецептов.
 
-    - Фильтры: topic, q (поиск), order(asc|desc)
-    - Пагинация: limit, offset
+    - Фильтры: topic, q (поиск), order(asc|desc), sort(relevance)
+    - Пагинация: limit (не больше 100), offset или cursor
+    - Фасеты: facets=topic
+    - Представление: view=summary — только карточки
+    - ETag / If-None-Match (кроме поиска и фасетов): 304, если страница не менялась
     """
-    return await svc.list_public(
+    etag = await svc.list_etag(
         db,
         current_user=current_user,
         topic=topic,
@@ -68,41 +112,140 @@ async def list_recipes(
         limit=limit,
         offset=offset,
         q=q,
+        cursor=cursor,
+        facets=facets,
+        view=view,
     )
+    if etag is not None:
+        cached = not_modified(request, response, etag)
+        if cached is not None:
+            return cached
+    page = await svc.list_public(
+        db,
+        current_user=current_user,
+        topic=topic,
+        order=order,
+        limit=limit,
+        offset=offset,
+        q=q,
+        cursor=cursor,
+        sort=sort,
+        facets=facets,
+        view=view,
+    )
+    return page if cursor is not None or facets else page.items
 
 
-@router.get("/popular", response_model=List[RecipePublic])
+@router.get("/popular", response_model=RecipeList)
 async def popular_recipes(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
     limit: int = 20,
     offset: int = 0,
-) -> List[RecipePublic]:
-    """Популярные рецепты (по лайкам)."""
-    return await svc.popular_public(
-        db, current_user=current_user, limit=limit, offset=offset
+    cursor: Optional[str] = Query(default=None, description=CURSOR_DESCRIPTION),
+    view: Literal["full", "summary"] = Query(default="full", description=VIEW_DESCRIPTION),
+) -> RecipeList:
+    """Популярные рецепты (по лайкам).
+
+    - Пагинация: limit (не больше 100), offset или cursor
+    - Представление: view=summary — только карточки
+    - ETag / If-None-Match: 304, если страница не менялась
+    """
+    etag = await svc.popular_etag(
+        db,
+        current_user=current_user,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        view=view,
+    )
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
+    page = await svc.popular_public(
+        db,
+        current_user=current_user,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        view=view,
+    )
+    return page if cursor is not None else page.items
+
+
+@router.get("/suggest", response_model=List[SuggestItem])
+async def suggest(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=20),
+) -> List[SuggestItem]:
+    """Подсказки для поиска: названия рецептов и ингредиентов по префиксу.
+
+    - Отвечает из индекса в памяти процесса, без запросов к БД
+    """
+    return await svc.suggest_public(prefix=prefix, limit=limit)
+
+
+@router.get("/cookable", response_model=List[CookableRecipe])
+async def cookable_recipes(
+    have: List[str] = Query(..., description="Продукты, которые есть у пользователя"),
+    min_coverage: float = Query(default=0.0, ge=0.0, le=1.0),
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+    current_user: User | None = Depends(get_current_user_optional),
+) -> List[CookableRecipe]:
+    """Что приготовить из имеющихся продуктов.
+
+    - Принимает: have (повторяемый параметр), min_coverage
+    - Сортировка: по доле ингредиентов рецепта, которые есть у пользователя
+    """
+    return await svc.cookable_public(
+        db,
+        current_user=current_user,
+        have=have,
+        limit=limit,
+        min_coverage=min_coverage,
     )
 
 
 @router.get("/{recipe_id}", response_model=RecipePublic)
 async def get_recipe(
     recipe_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
 ) -> RecipePublic:
-    """Один рецепт по id."""
+    """Один рецепт по id.
+
+    - ETag / If-None-Match: 304 после одного запроса версии, без загрузки рецепта
+    """
+    etag = await svc.recipe_etag(db, current_user=current_user, recipe_id=recipe_id)
+    if etag is not None:
+        cached = not_modified(request, response, etag)
+        if cached is not None:
+            return cached
     return await svc.get_public(db, current_user=current_user, recipe_id=recipe_id)
 
 
 @router.get("/{recipe_id}/comments", response_model=List[CommentPublic])
 async def list_comments(
     recipe_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User | None = Depends(get_current_user_optional),
     limit: int = 50,
     offset: int = 0,
 ) -> List[CommentPublic]:
-    """Комментарии к рецепту."""
+    """Комментарии к рецепту (с ETag / If-None-Match)."""
+    etag = await svc.comments_etag(
+        db, recipe_id=recipe_id, current_user=current_user, limit=limit, offset=offset
+    )
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
     return await svc.list_comments_public(
         db, recipe_id=recipe_id, current_user=current_user, limit=limit, offset=offset
     )
@@ -188,12 +331,16 @@ async def update_recipe(
     ),
     steps: Optional[str] = Form(
         default=None,
-        description="JSON list of {text}. Files in step_photos[] map by index",
+        description=(
+            "JSON list of {text, with_file?, photo_key?}. Files in step_photos[] "
+            "map by index; photo_key — key from /uploads/presign"
+        ),
     ),
+    photo_key: Optional[str] = Form(default=None, description=PHOTO_KEY_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ) -> RecipePublic:
-    """Обновление рецепта: поддерживает замену обложки и шагов (multipart)."""
+    """Обновление рецепта: поддерживает замену обложки и шагов (multipart или photo_key)."""
     return await svc.update_from_request(
         db,
         current_user=current_user,
@@ -204,4 +351,5 @@ async def update_recipe(
         topic=topic,
         ingredients=ingredients,
         steps=steps,
+        photo_key=photo_key,
     )
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from backend.models import User
+from backend.schemas.upload import PresignedUpload, PresignRequest
+from backend.services import app_uploads as svc
+from backend.services.deps import get_current_user
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+
+@router.post("/presign", response_model=PresignedUpload)
+async def presign_upload(
+    payload: PresignRequest,
+    current_user: User = Depends(get_current_user),
+) -> PresignedUpload:
+    """Presigned POST для загрузки фото напрямую в бакет.
+
+    - Принимает: kind (recipe|avatar), content_type (jpeg/png/webp)
+    - Ответ: url + fields для multipart POST в S3 и key
+    - key затем передаётся в photo_key рецепта/шага или профиля
+    - Бакет сам ограничивает размер (max_bytes) и Content-Type
+    """
+    return svc.presign(current_user=current_user, payload=payload)
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile
+from fastapi import APIRouter, Depends, File, Form, Query, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.db.session import get_db
@@ -12,17 +12,24 @@ from backend.services.deps import get_current_user, get_current_user_optional
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+VIEW_DESCRIPTION = (
+    "summary — рецепты в виде карточек (с ingredients_count, без описания и "
+    "ингредиентов); по умолчанию full"
+)
+
 
 @router.get("/me")
 async def get_me(
-    current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    view: Literal["full", "summary"] = Query(default="full", description=VIEW_DESCRIPTION),
 ) -> dict:
     """Текущий пользователь с его рецептами и лайками.
 
     - Требует авторизации
-    - Ответ: профиль + список моих рецептов
+    - Ответ: профиль + список моих рецептов (view=summary — карточки)
     """
-    return await svc.get_me(db, current_user=current_user)
+    return await svc.get_me(db, current_user=current_user, view=view)
 
 
 @router.get("/{user_id}")
@@ -30,13 +37,14 @@ async def get_public_profile(
     user_id: int,
     db: AsyncSession = Depends(get_db),
     viewer: User | None = Depends(get_current_user_optional),
+    view: Literal["full", "summary"] = Query(default="full", description=VIEW_DESCRIPTION),
 ) -> dict:
     """Публичный профиль пользователя и его рецепты.
 
     - Не требует авторизации (viewer опционален)
-    - Ответ: публичные данные и рецепты
+    - Ответ: публичные данные и рецепты (view=summary — карточки)
     """
-    return await svc.get_public_profile(db, user_id=user_id, viewer=viewer)
+    return await svc.get_public_profile(db, user_id=user_id, viewer=viewer, view=view)
 
 
 @router.patch("/me", response_model=UserPublic)
@@ -46,10 +54,14 @@ async def update_me(
     nickname: Optional[str] = Form(default=None),
     full_name: Optional[str] = Form(default=None),
     photo: Optional[UploadFile] = File(default=None),
+    photo_key: Optional[str] = Form(
+        default=None, description="Ключ аватара, загруженного через /uploads/presign"
+    ),
 ) -> UserPublic:
     """Обновление профиля (ник/ФИО/аватар) через multipart/form-data.
 
     - Поля опциональны; передавай только изменяемые
+    - Аватар: файл photo или photo_key из /uploads/presign
     - Ответ: обновлённый UserPublic
     """
     user = await svc.update_me_form(
@@ -58,6 +70,7 @@ async def update_me(
         nickname=nickname,
         full_name=full_name,
         photo=photo,
+        photo_key=photo_key,
     )
     return UserPublic.model_validate(user)
 
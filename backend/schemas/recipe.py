@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -11,10 +11,16 @@ class IngredientItem(BaseModel):
     quantity: str = Field(max_length=50)
 
 
+# Resized copies of a photo: {"webp": "<url> 320w, <url> 640w", "jpeg": ...};
+# None until they are generated
+Srcset = Optional[Dict[str, str]]
+
+
 class RecipeStepItem(BaseModel):
     order_index: int
     text: str
     photo_path: Optional[str] = None
+    srcset: Srcset = None
 
 
 class RecipeCreate(BaseModel):
@@ -29,6 +35,7 @@ class AuthorPublic(BaseModel):
     email: str
     nickname: Optional[str] = None
     photo_path: Optional[str] = None
+    srcset: Srcset = None
 
 
 class CommentPublic(BaseModel):
@@ -49,9 +56,46 @@ class RecipePublic(BaseModel):
     description: Optional[str] = None
     topic: TopicEnum
     photo_path: Optional[str] = None
+    srcset: Srcset = None
     created_at: datetime
     likes_count: int = 0
     liked_by_me: Optional[bool] = None
     ingredients: List[IngredientItem]
     steps: Optional[List[RecipeStepItem]] = None
     comments: Optional[List[CommentPublic]] = None
+    # Only for sort=relevance: escaped HTML with matches wrapped in <mark>
+    snippet: Optional[str] = None
+
+
+class RecipeSummary(BaseModel):
+    """Карточка рецепта для view=summary: без описания, шагов и списка ингредиентов."""
+
+    id: int
+    author_id: int
+    author: Optional[AuthorPublic] = None
+    title: str
+    topic: TopicEnum
+    photo_path: Optional[str] = None
+    srcset: Srcset = None
+    created_at: datetime
+    likes_count: int = 0
+    liked_by_me: Optional[bool] = None
+    ingredients_count: int = 0
+    snippet: Optional[str] = None
+
+
+class RecipePage(BaseModel):
+    items: List[Union[RecipePublic, RecipeSummary]]
+    next_cursor: Optional[str] = None
+    facets: Optional[Dict[str, Dict[str, int]]] = None
+
+
+class SuggestItem(BaseModel):
+    kind: str  # title | ingredient
+    text: str
+
+
+class CookableRecipe(RecipePublic):
+    coverage: float
+    matched_count: int
+    ingredients_count: int
@@ -0,0 +1,18 @@
+from typing import Dict, Literal
+
+from pydantic import BaseModel
+
+
+class PresignRequest(BaseModel):
+    # recipe — обложка или фото шага, avatar — аватар
+    kind: Literal["recipe", "avatar"]
+    content_type: Literal["image/jpeg", "image/png", "image/webp"]
+
+
+class PresignedUpload(BaseModel):
+    url: str
+    fields: Dict[str, str]
+    # Передаётся потом в photo_key / steps[].photo_key
+    key: str
+    max_bytes: int
+    expires_in: int
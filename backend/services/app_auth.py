@@ -48,8 +48,13 @@ async def register(db: AsyncSession, *, payload: RegisterRequest) -> MessageResp
     await ver_repo.create_code(user_id=user.id, code=code)
 
     try:
-        publish_verification_email(user.email, code)
+        await publish_verification_email(user.email, code)
     except Exception as e:
+        # Without the code the account could never be verified, and a retry
+        # would hit EMAIL_EXISTS: undo the registration (codes go by CASCADE)
+        await users_repo.delete(user)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=str(e))
 
     return MessageResponse(message="Registered. Check your email for the verification code.") 
@@ -107,7 +112,7 @@ async def forgot_password(db: AsyncSession, *, email: str) -> MessageResponse:
         s = get_settings()
         link = f"{s.frontend_url.rstrip('/')}/reset-password?token={token}"
         try:
-            publish_reset_email(user.email, link)
+            await publish_reset_email(user.email, link)
         except Exception:
             pass
     return MessageResponse(message="If the email exists, a reset link has been sent.")
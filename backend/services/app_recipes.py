@@ -1,27 +1,48 @@
 from __future__ import annotations
 
-import io
 import json
 import os
-from typing import List, Optional
+import time
+from datetime import datetime
+from functools import partial
+from typing import BinaryIO, Iterable, List, NamedTuple, Optional
 
 from fastapi import Request, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.core.errors import ErrorCode, http_error
+from backend.core.http_cache import make_etag
+from backend.core.pagination import clamp_limit, decode_cursor, encode_cursor
+from backend.core.topic_counters import (
+    get_topic_counts,
+    incr_topic_count,
+    set_topic_counts,
+)
 from backend.models import User
 from backend.models.comment import Comment
-from backend.models.recipe import Recipe, RecipeIngredient, TopicEnum
+from backend.models.recipe import Recipe, TopicEnum
 from backend.repositories.comments import CommentRepository
 from backend.repositories.recipes import RecipeRepository
 from backend.schemas.recipe import (
     AuthorPublic,
     CommentPublic,
+    CookableRecipe,
     IngredientItem,
+    RecipePage,
     RecipePublic,
     RecipeStepItem,
+    RecipeSummary,
+    SuggestItem,
+)
+from backend.services import images
+from backend.services.app_uploads import resolve_keys
+from backend.services import pantry as pantry_index
+from backend.services import suggest as suggest_index
+from backend.services.storage import (
+    check_upload_size,
+    get_public_url_or_presigned,
+    upload_many,
 )
-from backend.services.storage import upload_public_file, get_public_url_or_presigned
 
 
 def _slugify_ascii(text: str, fallback: str = "file") -> str:
@@ -43,6 +64,7 @@ def map_recipe_to_public(
     include_comments: bool = False,
     comments_list: Optional[list] = None,
     liked_by_me: bool | None = None,
+    snippet: Optional[str] = None,
 ) -> RecipePublic:
     ingredients = [
         IngredientItem(name=i.name, quantity=i.quantity) for i in recipe.ingredients
@@ -54,12 +76,14 @@ def map_recipe_to_public(
             email=recipe.author.email,
             nickname=recipe.author.nickname,
             photo_path=get_public_url_or_presigned(recipe.author.photo_path) if recipe.author.photo_path else None,
+            srcset=images.image_srcset(recipe.author.photo_path, recipe.author.photo_widths),
         )
     steps = [
         RecipeStepItem(
             order_index=s.order_index, 
             text=s.text, 
-            photo_path=get_public_url_or_presigned(s.photo_path) if s.photo_path else None
+            photo_path=get_public_url_or_presigned(s.photo_path) if s.photo_path else None,
+            srcset=images.image_srcset(s.photo_path, s.photo_widths),
         )
         for s in getattr(recipe, "steps", [])
     ]
@@ -73,6 +97,7 @@ def map_recipe_to_public(
                     email=c.author.email,
                     nickname=c.author.nickname,
                     photo_path=get_public_url_or_presigned(c.author.photo_path) if c.author.photo_path else None,
+                    srcset=images.image_srcset(c.author.photo_path, c.author.photo_widths),
                 ),
                 content=c.content,
                 created_at=c.created_at,
@@ -88,80 +113,128 @@ def map_recipe_to_public(
         description=recipe.description,
         topic=recipe.topic,
         photo_path=get_public_url_or_presigned(recipe.photo_path) if recipe.photo_path else None,
+        srcset=images.image_srcset(recipe.photo_path, recipe.photo_widths),
         created_at=recipe.created_at,
         likes_count=likes_count,
         liked_by_me=liked_by_me,
         ingredients=ingredients,
         steps=steps,
         comments=comments,
+        snippet=snippet,
     )
 
 
-async def create_from_request(
-    db: AsyncSession,
+async def _map_many_to_public(
+    recipes_repo: RecipeRepository,
+    recipes: List[Recipe],
     *,
-    current_user: User,
-    request: Request,
-    title: str,
-    description: Optional[str],
-    topic: TopicEnum,
-    ingredients: str,
-    steps: Optional[str],
-) -> RecipePublic:
-    try:
-        items: List[dict] = json.loads(ingredients)
-        parsed_ing = [IngredientItem(**item) for item in items]
-    except Exception:
-        raise http_error(ErrorCode.INVALID_INGREDIENTS_JSON)
+    current_user: Optional[User],
+    snippets: Optional[dict[int, str]] = None,
+) -> List[RecipePublic]:
+    # One query for the whole page instead of one per recipe
+    liked = await recipes_repo.liked_ids(
+        (r.id for r in recipes),
+        user_id=(current_user.id if current_user else None),
+    )
+    return [
+        map_recipe_to_public(
+            r,
+            likes_count=r.likes_count,
+            include_author=True,
+            liked_by_me=(r.id in liked) if liked is not None else None,
+            snippet=snippets.get(r.id) if snippets else None,
+        )
+        for r in recipes
+    ]
 
-    form = await request.form()
 
-    # cover photo
-    photo_file: Optional[UploadFile] = None
+async def _map_summaries(
+    recipes_repo: RecipeRepository,
+    rows: list,
+    *,
+    current_user: Optional[User],
+    snippets: Optional[dict[int, str]] = None,
+) -> List[RecipeSummary]:
+    """Строки RecipeRepository(summary=True) -> карточки RecipeSummary."""
+    liked = await recipes_repo.liked_ids(
+        (r.id for r in rows),
+        user_id=(current_user.id if current_user else None),
+    )
+    return [
+        RecipeSummary(
+            id=r.id,
+            author_id=r.author_id,
+            author=AuthorPublic(
+                id=r.author_id,
+                email=r.author_email,
+                nickname=r.author_nickname,
+                photo_path=get_public_url_or_presigned(r.author_photo_path) if r.author_photo_path else None,
+                srcset=images.image_srcset(r.author_photo_path, r.author_photo_widths),
+            ),
+            title=r.title,
+            topic=r.topic,
+            photo_path=get_public_url_or_presigned(r.photo_path) if r.photo_path else None,
+            srcset=images.image_srcset(r.photo_path, r.photo_widths),
+            created_at=r.created_at,
+            likes_count=r.likes_count,
+            liked_by_me=(r.id in liked) if liked is not None else None,
+            ingredients_count=r.ingredients_count,
+            snippet=snippets.get(r.id) if snippets else None,
+        )
+        for r in rows
+    ]
+
+
+async def _map_page(
+    recipes_repo: RecipeRepository,
+    recipes: list,
+    *,
+    current_user: Optional[User],
+    summary: bool,
+    snippets: Optional[dict[int, str]] = None,
+) -> list:
+    mapper = _map_summaries if summary else _map_many_to_public
+    return await mapper(
+        recipes_repo, recipes, current_user=current_user, snippets=snippets
+    )
+
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def _image_ext(file: UploadFile) -> str:
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in IMAGE_EXTENSIONS:
+        raise http_error(ErrorCode.INVALID_IMAGE_TYPE)
+    check_upload_size(file.size)
+    return ext
+
+
+def _cover_file(form) -> Optional[UploadFile]:
     for key in ("photo", "photo[]"):
         if key in form:
             candidate = (
                 form.getlist(key)[0] if hasattr(form, "getlist") else form.get(key)
             )
             if candidate is not None and getattr(candidate, "filename", None):
-                photo_file = candidate  # type: ignore[assignment]
-                break
+                return candidate  # type: ignore[return-value]
+    return None
 
-    # Read cover photo (if any) but upload only after recipe is created to use its id
-    photo_ext: Optional[str] = None
-    photo_bytes: Optional[bytes] = None
-    if photo_file is not None:
-        ext = os.path.splitext(photo_file.filename or "")[1].lower()
-        if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
-            raise http_error(ErrorCode.INVALID_IMAGE_TYPE)
-        photo_ext = ext
-        photo_bytes = await photo_file.read()
 
-    recipes_repo = RecipeRepository(db)
-    recipe = Recipe(
-        author_id=current_user.id,
-        title=title,
-        description=description,
-        topic=topic,
-        photo_path=None,
-    )
-    recipe = await recipes_repo.create(recipe)
+class StepPlan(NamedTuple):
+    order_index: int
+    text: str
+    file: Optional[UploadFile]
+    ext: Optional[str]
+    # Ключ файла, заранее загруженного через /uploads/presign
+    photo_key: Optional[str]
 
-    for i in parsed_ing:
-        db.add(RecipeIngredient(recipe_id=recipe.id, name=i.name, quantity=i.quantity))
-    await db.commit()
-    await db.refresh(recipe)
 
-    # Now that we have recipe.id, upload the cover photo with a unique key
-    if photo_bytes is not None and photo_ext is not None:
-        key = f"recipes/{current_user.id}/{recipe.id}/cover{photo_ext}"
-        recipe.photo_path = upload_public_file(io.BytesIO(photo_bytes), key)
-        db.add(recipe)
-        await db.commit()
-        await db.refresh(recipe)
+def _plan_steps(steps: Optional[str], form) -> List[StepPlan]:
+    """Шаги из JSON + файлы step_photos[] по порядку with_file (или photo_key).
 
-    # steps
-    step_items: List[dict] = []
+    Типы файлов проверяются здесь, до записи чего-либо в БД или S3.
+    """
     try:
         step_items = json.loads(steps or "[]")
         if not isinstance(step_items, list):
@@ -177,27 +250,160 @@ async def create_from_request(
             if files:
                 break
 
-    uploaded_steps: List[tuple[int, str, str | None]] = []
+    plan: List[StepPlan] = []
     file_cursor = 0
     for idx, item in enumerate(step_items):
+        if not isinstance(item, dict):
+            continue
         text = str(item.get("text", "")).strip()
         if not text:
             continue
-        url: Optional[str] = None
+        f: Optional[UploadFile] = None
+        ext: Optional[str] = None
         if bool(item.get("with_file")) and file_cursor < len(files):
             f = files[file_cursor]
             file_cursor += 1
-            ext = os.path.splitext(f.filename or "")[1].lower()
-            if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
-                raise http_error(ErrorCode.INVALID_IMAGE_TYPE)
-            key = f"recipes/{current_user.id}/{recipe.id}/steps/step_{idx+1}{ext}"
-            data = await f.read()
-            url = upload_public_file(io.BytesIO(data), key)
-        uploaded_steps.append((idx + 1, text, url))
-
-    if uploaded_steps:
-        await recipes_repo.set_steps(recipe.id, uploaded_steps)
-        recipe = await recipes_repo.get(recipe.id)  # refresh
+            ext = _image_ext(f)
+        photo_key = item.get("photo_key") or None
+        if photo_key is not None and not isinstance(photo_key, str):
+            raise http_error(ErrorCode.INVALID_UPLOAD_KEY)
+        plan.append(StepPlan(idx + 1, text, f, ext, photo_key))
+    return plan
+
+
+async def _resolve_photo_keys(
+    db: AsyncSession,
+    current_user: User,
+    photo_key: Optional[str],
+    step_plan: List[StepPlan],
+) -> dict[str, str]:
+    return await resolve_keys(
+        db,
+        [photo_key, *(step.photo_key for step in step_plan)],
+        kind="recipe",
+        user_id=current_user.id,
+    )
+
+
+async def _upload_photos(
+    *,
+    base_key: str,
+    suffix: str,
+    cover: Optional[UploadFile],
+    cover_ext: Optional[str],
+    step_plan: List[StepPlan],
+    cover_photo_key: Optional[str] = None,
+    keyed: Optional[dict[str, str]] = None,
+) -> tuple[Optional[str], dict[int, str]]:
+    """Обложка и фото шагов одной параллельной пачкой: (URL обложки, {шаг: URL}).
+
+    Файлы читаются потоком прямо из spooled-файлов multipart-формы; уже
+    загруженные через presign (keyed: ключ -> URL) только подставляются.
+    """
+    keyed = keyed or {}
+    uploads: List[tuple[BinaryIO, str]] = []
+    cover_key: Optional[str] = None
+    if cover is not None:
+        cover_key = f"{base_key}/cover{suffix}{cover_ext}"
+        uploads.append((cover.file, cover_key))
+    step_keys: dict[int, str] = {}
+    for step in step_plan:
+        if step.file is not None:
+            key = f"{base_key}/steps/step_{step.order_index}{suffix}{step.ext}"
+            step_keys[step.order_index] = key
+            uploads.append((step.file.file, key))
+    uploaded = await upload_many(uploads)
+    step_urls = {
+        step.order_index: keyed[step.photo_key]
+        for step in step_plan
+        if step.file is None and step.photo_key
+    }
+    step_urls.update(
+        {order_index: uploaded[key] for order_index, key in step_keys.items()}
+    )
+    return (
+        uploaded[cover_key] if cover_key else keyed.get(cover_photo_key or ""),
+        step_urls,
+    )
+
+
+async def _mark_derivatives(
+    recipe_id: int, url: str, db: AsyncSession, widths: List[int]
+) -> None:
+    await RecipeRepository(db).set_photo_widths(recipe_id, url, widths)
+
+
+def _enqueue_derivatives(recipe_id: int, urls: Iterable[Optional[str]]) -> None:
+    """Уменьшенные копии новых фото делаются в фоне (services/images.py)."""
+    for url in urls:
+        images.enqueue(url, partial(_mark_derivatives, recipe_id, url))
+
+
+async def create_from_request(
+    db: AsyncSession,
+    *,
+    current_user: User,
+    request: Request,
+    title: str,
+    description: Optional[str],
+    topic: TopicEnum,
+    ingredients: str,
+    steps: Optional[str],
+    photo_key: Optional[str] = None,
+) -> RecipePublic:
+    try:
+        items: List[dict] = json.loads(ingredients)
+        parsed_ing = [IngredientItem(**item) for item in items]
+    except Exception:
+        raise http_error(ErrorCode.INVALID_INGREDIENTS_JSON)
+
+    form = await request.form()
+    photo_file = _cover_file(form)
+    photo_ext = _image_ext(photo_file) if photo_file is not None else None
+    step_plan = _plan_steps(steps, form)
+    keyed = await _resolve_photo_keys(db, current_user, photo_key, step_plan)
+
+    recipes_repo = RecipeRepository(db)
+    recipe = Recipe(
+        author_id=current_user.id,
+        title=title,
+        description=description,
+        topic=topic,
+        photo_path=None,
+    )
+    recipe = await recipes_repo.create(recipe)
+    await incr_topic_count(recipe.topic.value, 1)
+
+    ingredients = await recipes_repo.add_ingredients(
+        recipe.id, [(i.name, i.quantity) for i in parsed_ing]
+    )
+    suggest_index.note_recipe(recipe.title, (i.name for i in parsed_ing))
+    pantry_index.note_recipe(recipe.id, ingredients)
+
+    # Now that we have recipe.id, upload the cover and step photos concurrently
+    cover_url, step_urls = await _upload_photos(
+        base_key=f"recipes/{current_user.id}/{recipe.id}",
+        suffix="",
+        cover=photo_file,
+        cover_ext=photo_ext,
+        step_plan=step_plan,
+        cover_photo_key=photo_key,
+        keyed=keyed,
+    )
+    if cover_url is not None:
+        recipe.photo_path = cover_url
+        db.add(recipe)
+    step_rows = [
+        (step.order_index, step.text, step_urls.get(step.order_index))
+        for step in step_plan
+    ]
+    if step_rows:
+        # One batch for all steps; commits the cover path as well
+        await recipes_repo.set_steps(recipe.id, step_rows)
+    else:
+        await db.commit()
+    await db.refresh(recipe)
+    _enqueue_derivatives(recipe.id, [cover_url, *step_urls.values()])
 
     return map_recipe_to_public(recipe, likes_count=0)
 
@@ -211,25 +417,121 @@ async def list_public(
     limit: int,
     offset: int,
     q: Optional[str] = None,
-) -> List[RecipePublic]:
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    facets: Optional[str] = None,
+    view: str = "full",
+) -> RecipePage:
     recipes_repo = RecipeRepository(db)
-    recipes = await recipes_repo.list_recipes(
-        topic=topic, limit=limit, offset=offset, order=(order or "desc"), q=q
-    )
-    result: List[RecipePublic] = []
-    for r in recipes:
-        liked = await recipes_repo.liked_by_user(
-            recipe_id=r.id, user_id=(current_user.id if current_user else None)
+    limit = clamp_limit(limit)
+    summary = view == "summary"
+    if (sort or "").lower() == "relevance" and q and q.strip():
+        page = await _search_relevance_public(
+            recipes_repo,
+            current_user=current_user,
+            topic=topic,
+            q=q,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            summary=summary,
         )
-        result.append(
-            map_recipe_to_public(
-                r,
-                likes_count=await recipes_repo.likes_count(r.id),
-                include_author=True,
-                liked_by_me=liked,
-            )
+    else:
+        page = await _feed_page(
+            recipes_repo,
+            current_user=current_user,
+            topic=topic,
+            order=order,
+            q=q,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            summary=summary,
         )
-    return result
+    if facets == "topic":
+        page.facets = {"topic": await _topic_facets(recipes_repo, q=q)}
+    return page
+
+
+async def _feed_page(
+    recipes_repo: RecipeRepository,
+    *,
+    current_user: Optional[User],
+    topic: Optional[TopicEnum],
+    order: Optional[str],
+    q: Optional[str],
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    summary: bool = False,
+) -> RecipePage:
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, kind="feed", fields=(datetime.fromisoformat, int))
+    # One extra row tells whether there is a next page
+    recipes = await recipes_repo.list_recipes(
+        topic=topic,
+        limit=limit + 1,
+        offset=offset,
+        order=(order or "desc"),
+        q=q,
+        after=after,
+        summary=summary,
+    )
+    next_cursor = None
+    if len(recipes) > limit:
+        recipes = recipes[:limit]
+        last = recipes[-1]
+        next_cursor = encode_cursor("feed", [last.created_at, last.id])
+    items = await _map_page(
+        recipes_repo, recipes, current_user=current_user, summary=summary
+    )
+    return RecipePage(items=items, next_cursor=next_cursor)
+
+
+async def _topic_facets(
+    recipes_repo: RecipeRepository, *, q: Optional[str]
+) -> dict[str, int]:
+    if q and q.strip():
+        return await recipes_repo.topic_counts(q=q)
+    # Unfiltered counts are served from the Redis counter and rebuilt on miss
+    counts = await get_topic_counts()
+    if counts is None:
+        counts = await recipes_repo.topic_counts()
+        await set_topic_counts(counts)
+    return counts
+
+
+async def _search_relevance_public(
+    recipes_repo: RecipeRepository,
+    *,
+    current_user: Optional[User],
+    topic: Optional[TopicEnum],
+    q: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    summary: bool = False,
+) -> RecipePage:
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, kind="relevance", fields=(float, int))
+    rows = await recipes_repo.search_ranked(
+        topic=topic, q=q, limit=limit + 1, offset=offset, after=after, summary=summary
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last, last_rank, _ = rows[-1]
+        next_cursor = encode_cursor("relevance", [last_rank, last.id])
+    items = await _map_page(
+        recipes_repo,
+        [recipe for recipe, _, _ in rows],
+        current_user=current_user,
+        summary=summary,
+        snippets={recipe.id: snippet for recipe, _, snippet in rows},
+    )
+    return RecipePage(items=items, next_cursor=next_cursor)
 
 
 async def popular_public(
@@ -238,23 +540,146 @@ async def popular_public(
     current_user: Optional[User],
     limit: int,
     offset: int,
-) -> List[RecipePublic]:
+    cursor: Optional[str] = None,
+    view: str = "full",
+) -> RecipePage:
     recipes_repo = RecipeRepository(db)
-    recipes = await recipes_repo.popular(limit=limit, offset=offset)
-    result: List[RecipePublic] = []
-    for r in recipes:
-        liked = await recipes_repo.liked_by_user(
-            recipe_id=r.id, user_id=(current_user.id if current_user else None)
+    limit = clamp_limit(limit)
+    summary = view == "summary"
+    after = None
+    if cursor:
+        after = decode_cursor(
+            cursor, kind="popular", fields=(int, datetime.fromisoformat, int)
         )
-        result.append(
-            map_recipe_to_public(
-                r,
-                likes_count=await recipes_repo.likes_count(r.id),
-                include_author=True,
-                liked_by_me=liked,
-            )
+    recipes = await recipes_repo.popular(
+        limit=limit + 1, offset=offset, after=after, summary=summary
+    )
+    next_cursor = None
+    if len(recipes) > limit:
+        recipes = recipes[:limit]
+        last = recipes[-1]
+        next_cursor = encode_cursor(
+            "popular", [last.likes_count, last.created_at, last.id]
         )
-    return result
+    items = await _map_page(
+        recipes_repo, recipes, current_user=current_user, summary=summary
+    )
+    return RecipePage(items=items, next_cursor=next_cursor)
+
+
+async def list_etag(
+    db: AsyncSession,
+    *,
+    current_user: Optional[User],
+    topic: Optional[TopicEnum],
+    order: Optional[str],
+    limit: int,
+    offset: int,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    facets: Optional[str] = None,
+    view: str = "full",
+) -> Optional[str]:
+    """ETag страницы ленты; None — для поиска и фасетов ETag не считаем."""
+    if (q and q.strip()) or facets:
+        return None
+    after = None
+    if cursor:
+        after = decode_cursor(cursor, kind="feed", fields=(datetime.fromisoformat, int))
+    viewer_id = current_user.id if current_user else None
+    count, digest = await RecipeRepository(db).feed_version(
+        topic=topic,
+        limit=clamp_limit(limit) + 1,  # the extra row decides next_cursor
+        offset=offset,
+        order=(order or "desc"),
+        after=after,
+        user_id=viewer_id,
+    )
+    return make_etag("feed", view, viewer_id, count, digest)
+
+
+async def popular_etag(
+    db: AsyncSession,
+    *,
+    current_user: Optional[User],
+    limit: int,
+    offset: int,
+    cursor: Optional[str] = None,
+    view: str = "full",
+) -> str:
+    after = None
+    if cursor:
+        after = decode_cursor(
+            cursor, kind="popular", fields=(int, datetime.fromisoformat, int)
+        )
+    viewer_id = current_user.id if current_user else None
+    count, digest = await RecipeRepository(db).popular_version(
+        limit=clamp_limit(limit) + 1, offset=offset, after=after, user_id=viewer_id
+    )
+    return make_etag("popular", view, viewer_id, count, digest)
+
+
+async def recipe_etag(
+    db: AsyncSession, *, current_user: Optional[User], recipe_id: int
+) -> Optional[str]:
+    """ETag детальной страницы; None — рецепта нет."""
+    viewer_id = current_user.id if current_user else None
+    row = await RecipeRepository(db).version(recipe_id, user_id=viewer_id)
+    if row is None:
+        return None
+    return make_etag("recipe", viewer_id, *row)
+
+
+async def comments_etag(
+    db: AsyncSession,
+    *,
+    recipe_id: int,
+    current_user: Optional[User],
+    limit: int,
+    offset: int,
+) -> str:
+    viewer_id = current_user.id if current_user else None
+    count, digest = await CommentRepository(db).page_version(
+        recipe_id=recipe_id, limit=limit, offset=offset
+    )
+    return make_etag("comments", recipe_id, viewer_id, count, digest)
+
+
+async def suggest_public(*, prefix: str, limit: int) -> List[SuggestItem]:
+    rows = await suggest_index.suggest(prefix, limit)
+    return [SuggestItem(kind=kind, text=text) for kind, text in rows]
+
+
+MAX_PANTRY_ITEMS = 50
+
+
+async def cookable_public(
+    db: AsyncSession,
+    *,
+    current_user: Optional[User],
+    have: List[str],
+    limit: int,
+    min_coverage: float = 0.0,
+) -> List[CookableRecipe]:
+    recipes_repo = RecipeRepository(db)
+    ranked = await pantry_index.rank(
+        have[:MAX_PANTRY_ITEMS], limit=clamp_limit(limit), min_coverage=min_coverage
+    )
+    by_id = await recipes_repo.get_many(recipe_id for recipe_id, *_ in ranked)
+    # Recipes deleted by another process may still be in the index until it reloads
+    ranked = [row for row in ranked if row[0] in by_id]
+    items = await _map_many_to_public(
+        recipes_repo, [by_id[row[0]] for row in ranked], current_user=current_user
+    )
+    return [
+        CookableRecipe(
+            **item.model_dump(),
+            coverage=coverage,
+            matched_count=matched,
+            ingredients_count=total,
+        )
+        for item, (_, coverage, matched, total) in zip(items, ranked)
+    ]
 
 
 async def get_public(
@@ -267,16 +692,15 @@ async def get_public(
     recipe = await recipes_repo.get(recipe_id)
     if not recipe:
         raise http_error(ErrorCode.RECIPE_NOT_FOUND)
-    liked = await recipes_repo.liked_by_user(
-        recipe_id=recipe.id, user_id=(current_user.id if current_user else None)
+    liked = await recipes_repo.liked_ids(
+        [recipe.id], user_id=(current_user.id if current_user else None)
     )
-    likes = await recipes_repo.likes_count(recipe.id)
     return map_recipe_to_public(
         recipe,
-        likes_count=likes,
+        likes_count=recipe.likes_count,
         include_author=True,
         include_comments=False,
-        liked_by_me=liked,
+        liked_by_me=(recipe.id in liked) if liked is not None else None,
     )
 
 
@@ -295,12 +719,17 @@ async def toggle_like(
 async def delete_by_author(
     db: AsyncSession, *, current_user: User, recipe_id: int
 ) -> None:
-    recipes_repo = RecipeRepository(db)
-    ok = await recipes_repo.delete_by_author(
+    deleted = await RecipeRepository(db).delete_by_author(
         recipe_id=recipe_id, author_id=current_user.id
     )
-    if not ok:
+    if deleted is None:
         raise http_error(ErrorCode.RECIPE_NOT_FOUND)
+    topic, photo_paths = deleted
+    # попадут в pending_deletes тем же коммитом, что и удаление рецепта
+    images.schedule_deletes(db, photo_paths)
+    await db.commit()
+    pantry_index.forget_recipe(recipe_id)
+    await incr_topic_count(topic.value, -1)
 
 
 async def update_from_request(
@@ -314,6 +743,7 @@ async def update_from_request(
     topic: Optional[TopicEnum],
     ingredients: Optional[str],
     steps: Optional[str],
+    photo_key: Optional[str] = None,
 ) -> RecipePublic:
     recipes_repo = RecipeRepository(db)
     recipe = await recipes_repo.get(recipe_id)
@@ -323,94 +753,87 @@ async def update_from_request(
         raise http_error(ErrorCode.FORBIDDEN)
 
     form = await request.form()
+    photo_file = _cover_file(form)
+    photo_ext = _image_ext(photo_file) if photo_file is not None else None
+    step_plan = _plan_steps(steps, form) if steps is not None else None
+    keyed = await _resolve_photo_keys(db, current_user, photo_key, step_plan or [])
+    parsed: Optional[list[tuple[str, str]]] = None
+    if ingredients is not None:
+        try:
+            items: list[dict] = json.loads(ingredients)
+            parsed = [(str(i["name"]), str(i["quantity"])) for i in items]
+        except Exception:
+            raise http_error(ErrorCode.INVALID_INGREDIENTS_JSON)
 
-    # Update cover photo if provided in any of expected keys
-    photo_file: Optional[UploadFile] = None
-    for key in ("photo", "photo[]"):
-        if key in form:
-            candidate = (
-                form.getlist(key)[0] if hasattr(form, "getlist") else form.get(key)
-            )
-            if candidate is not None and getattr(candidate, "filename", None):
-                photo_file = candidate  # type: ignore[assignment]
-                break
-    if photo_file is not None:
-        ext = os.path.splitext(photo_file.filename or "")[1].lower()
-        if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
-            raise http_error(ErrorCode.INVALID_IMAGE_TYPE)
-        key = f"recipes/{current_user.id}/{recipe.id}/cover{ext}"
-        data = await photo_file.read()
-        recipe.photo_path = upload_public_file(io.BytesIO(data), key)
+    # New photos get fresh keys, so a failed upload batch never overwrites
+    # objects the current version of the recipe still points at
+    cover_url, step_urls = await _upload_photos(
+        base_key=f"recipes/{current_user.id}/{recipe.id}",
+        suffix=f"_{int(time.time())}",
+        cover=photo_file,
+        cover_ext=photo_ext,
+        step_plan=step_plan or [],
+        cover_photo_key=photo_key,
+        keyed=keyed,
+    )
+    new_urls = {cover_url, *step_urls.values()}
+    superseded: list[str] = []
+    if cover_url is not None:
+        if recipe.photo_path:
+            superseded.append(recipe.photo_path)
+        recipe.photo_path = cover_url
+        recipe.photo_widths = None
 
     # Update primitive fields
     if title is not None:
         recipe.title = title
     if description is not None:
         recipe.description = description
+    old_topic = recipe.topic
     if topic is not None:
         recipe.topic = topic
+    suggest_index.note_recipe(title)
 
     # Update ingredients if provided
-    if ingredients is not None:
-        try:
-            items: list[dict] = json.loads(ingredients)
-            parsed = [(str(i["name"]), str(i["quantity"])) for i in items]
-        except Exception:
-            raise http_error(ErrorCode.INVALID_INGREDIENTS_JSON)
-        await recipes_repo.replace_ingredients(recipe.id, parsed)
+    if parsed is not None:
+        ingredients = await recipes_repo.replace_ingredients(recipe.id, parsed)
+        suggest_index.note_recipe(None, (name for name, _ in parsed))
+        pantry_index.note_recipe(recipe.id, ingredients)
 
     # Update steps if provided
-    if steps is not None:
-        try:
-            step_items: list[dict] = json.loads(steps or "[]")
-            if not isinstance(step_items, list):
-                step_items = []
-        except Exception:
-            step_items = []
-
-        # Load existing steps to preserve photos that aren't being replaced
+    if step_plan is not None:
+        # Steps without a new file keep their current photo
         existing_steps = {s.order_index: s.photo_path for s in recipe.steps}
+        existing_widths = {
+            s.photo_path: s.photo_widths for s in recipe.steps if s.photo_path
+        }
+        step_rows = [
+            (
+                step.order_index,
+                step.text,
+                step_urls.get(step.order_index)
+                or existing_steps.get(step.order_index),
+            )
+            for step in step_plan
+        ]
+        kept = {url for _, _, url in step_rows if url}
+        superseded.extend(
+            url for url in existing_steps.values() if url and url not in kept
+        )
+        await recipes_repo.set_steps(
+            recipe.id, step_rows, photo_widths=existing_widths
+        )
 
-        files: list[UploadFile] = []
-        for key in ("step_photos", "step_photos[]"):
-            if key in form:
-                lst = form.getlist(key) if hasattr(form, "getlist") else [form.get(key)]
-                files = [f for f in lst if f is not None and getattr(f, "filename", None)]  # type: ignore[list-item]
-                if files:
-                    break
-
-        uploaded_steps: list[tuple[int, str, str | None]] = []
-        file_cursor = 0
-        for idx, item in enumerate(step_items):
-            text = str(item.get("text", "")).strip()
-            if not text:
-                continue
-            url: str | None = None
-            order_index = idx + 1
-            
-            # Check if a new file is being uploaded for this step
-            if bool(item.get("with_file")) and file_cursor < len(files):
-                # New file uploaded - use it
-                f = files[file_cursor]
-                file_cursor += 1
-                ext = os.path.splitext(f.filename or "")[1].lower()
-                if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
-                    raise http_error(ErrorCode.INVALID_IMAGE_TYPE)
-                key = f"recipes/{current_user.id}/{recipe.id}/steps/step_{order_index}{ext}"
-                data = await f.read()
-                url = upload_public_file(io.BytesIO(data), key)
-            elif order_index in existing_steps:
-                # No new file, but step had a photo - preserve it
-                url = existing_steps[order_index]
-            # If with_file is False or not set and no existing photo, url remains None
-            
-            uploaded_steps.append((order_index, text, url))
-        await recipes_repo.set_steps(recipe.id, uploaded_steps)
-
+    images.schedule_deletes(db, (url for url in superseded if url not in new_urls))
     await db.commit()
     await db.refresh(recipe)
-    likes = await recipes_repo.likes_count(recipe.id)
-    return map_recipe_to_public(recipe, likes_count=likes, include_author=True)
+    if recipe.topic != old_topic:
+        await incr_topic_count(old_topic.value, -1)
+        await incr_topic_count(recipe.topic.value, 1)
+    _enqueue_derivatives(recipe.id, [cover_url, *step_urls.values()])
+    return map_recipe_to_public(
+        recipe, likes_count=recipe.likes_count, include_author=True
+    )
 
 
 async def list_comments_public(
@@ -436,6 +859,7 @@ async def list_comments_public(
                 email=c.author.email,
                 nickname=c.author.nickname,
                 photo_path=get_public_url_or_presigned(c.author.photo_path) if c.author.photo_path else None,
+                srcset=images.image_srcset(c.author.photo_path, c.author.photo_widths),
             ),
             content=c.content,
             created_at=c.created_at,
@@ -476,6 +900,7 @@ async def add_comment(
             email=current_user.email,
             nickname=current_user.nickname,
             photo_path=get_public_url_or_presigned(current_user.photo_path) if current_user.photo_path else None,
+            srcset=images.image_srcset(current_user.photo_path, current_user.photo_widths),
         ),
         content=comment.content,
         created_at=comment.created_at,
@@ -511,6 +936,7 @@ async def edit_comment(
             email=current_user.email,
             nickname=current_user.nickname,
             photo_path=get_public_url_or_presigned(current_user.photo_path) if current_user.photo_path else None,
+            srcset=images.image_srcset(current_user.photo_path, current_user.photo_widths),
         ),
         content=comment.content,
         created_at=comment.created_at,
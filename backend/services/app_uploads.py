@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import get_settings
+from backend.core.errors import ErrorCode, http_error
+from backend.models import User
+from backend.repositories.pending_deletes import PendingDeleteRepository
+from backend.schemas.upload import PresignedUpload, PresignRequest
+from backend.services.storage import object_exists_async, presigned_post, public_url
+
+EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp"}
+# Exactly the names presign() hands out: derivative copies (<name>_w320.webp)
+# and server-written files never qualify
+_UPLOAD_NAME = re.compile(
+    r"[0-9a-f]{32}(%s)" % "|".join(re.escape(e) for e in EXTENSIONS.values())
+)
+
+
+def _prefix(kind: str, user_id: int) -> str:
+    if kind == "avatar":
+        return f"avatars/{user_id}/uploads/"
+    return f"recipes/{user_id}/uploads/"
+
+
+def presign(*, current_user: User, payload: PresignRequest) -> PresignedUpload:
+    """Политика для прямой загрузки файла в бакет под ключом пользователя."""
+    s = get_settings()
+    key = (
+        _prefix(payload.kind, current_user.id)
+        + uuid.uuid4().hex
+        + EXTENSIONS[payload.content_type]
+    )
+    post = presigned_post(
+        key,
+        content_type=payload.content_type,
+        max_bytes=s.upload_max_bytes,
+        expires_in=s.upload_presign_expires_seconds,
+    )
+    return PresignedUpload(
+        url=post["url"],
+        fields=post["fields"],
+        key=key,
+        max_bytes=s.upload_max_bytes,
+        expires_in=s.upload_presign_expires_seconds,
+    )
+
+
+def _check_owned(key: str, *, kind: str, user_id: int) -> None:
+    prefix = _prefix(kind, user_id)
+    if not (key.startswith(prefix) and _UPLOAD_NAME.fullmatch(key[len(prefix) :])):
+        raise http_error(ErrorCode.INVALID_UPLOAD_KEY)
+
+
+async def resolve_keys(
+    db: AsyncSession, keys: Iterable[Optional[str]], *, kind: str, user_id: int
+) -> dict[str, str]:
+    """Ключи загруженных через presign файлов -> URL для БД.
+
+    Ключ должен лежать под префиксом пользователя, реально существовать
+    в бакете и быть свободным: не встречаться в запросе дважды, не числиться
+    за другой строкой и не стоять в pending_deletes (иначе удаление одной
+    строки удалило бы файл другой); иначе INVALID_UPLOAD_KEY.
+    """
+    given = [k for k in keys if k]
+    if not all(isinstance(k, str) for k in given):
+        raise http_error(ErrorCode.INVALID_UPLOAD_KEY)
+    unique = list(dict.fromkeys(given))
+    if len(unique) != len(given):
+        raise http_error(ErrorCode.INVALID_UPLOAD_KEY)
+    for key in unique:
+        _check_owned(key, kind=kind, user_id=user_id)
+    urls = {key: public_url(key) for key in unique}
+    # Same session (and transaction) as the write that will attach the keys
+    if await PendingDeleteRepository(db).in_use(unique, list(urls.values())):
+        raise http_error(ErrorCode.INVALID_UPLOAD_KEY)
+    found = await asyncio.gather(*(object_exists_async(key) for key in unique))
+    if not all(found):
+        raise http_error(ErrorCode.INVALID_UPLOAD_KEY)
+    return urls
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import io
 import os
 import time
-from typing import Optional
+from functools import partial
+from typing import List, Optional
 
 from fastapi import HTTPException, UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -15,32 +15,62 @@ from backend.repositories.recipes import RecipeRepository
 from backend.repositories.users import UserRepository
 from backend.schemas.common import PhotoResponse
 from backend.schemas.user import ChangePasswordRequest
-from backend.services.storage import delete_file_by_url, upload_public_file, get_public_url_or_presigned
-
-
-async def get_me(db: AsyncSession, *, current_user: User) -> dict:
+from backend.services import images
+from backend.services.app_uploads import resolve_keys
+from backend.services.storage import (
+    check_upload_size,
+    get_public_url_or_presigned,
+    upload_public_file_async,
+)
+
+
+def _summary_cards(rows, liked: Optional[set]) -> list[dict]:
+    """Карточки для view=summary из строк list_by_author(summary=True)."""
+    return [
+        {
+            "id": r.id,
+            "title": r.title,
+            "topic": r.topic.value if hasattr(r.topic, "value") else str(r.topic),
+            "photo_path": get_public_url_or_presigned(r.photo_path) if r.photo_path else None,
+            "srcset": images.image_srcset(r.photo_path, r.photo_widths),
+            "created_at": r.created_at,
+            "likes_count": r.likes_count,
+            "liked_by_me": (r.id in liked) if liked is not None else None,
+            "ingredients_count": r.ingredients_count,
+        }
+        for r in rows
+    ]
+
+
+async def get_me(db: AsyncSession, *, current_user: User, view: str = "full") -> dict:
     recipes_repo = RecipeRepository(db)
-    recipes_rows = await recipes_repo.list_by_author(author_id=current_user.id)
-    recipes: list[dict] = []
-    for r in recipes_rows:
-        likes = await recipes_repo.likes_count(r.id)
-        liked_by_me = await recipes_repo.liked_by_user(
-            recipe_id=r.id, user_id=current_user.id
-        )
-        recipes.append(
-            {
-                "id": r.id,
-                "title": r.title,
-                "topic": r.topic.value if hasattr(r.topic, "value") else str(r.topic),
-                "photo_path": get_public_url_or_presigned(r.photo_path) if r.photo_path else None,
-                "description": r.description,
-                "ingredients": [
-                    {"name": i.name, "quantity": i.quantity} for i in r.ingredients
-                ],
-                "likes_count": likes,
-                "liked_by_me": liked_by_me,
-            }
-        )
+    summary = view == "summary"
+    recipes_rows = await recipes_repo.list_by_author(
+        author_id=current_user.id, summary=summary
+    )
+    liked = await recipes_repo.liked_ids(
+        (r.id for r in recipes_rows), user_id=current_user.id
+    )
+    if summary:
+        recipes = _summary_cards(recipes_rows, liked)
+    else:
+        recipes = []
+        for r in recipes_rows:
+            recipes.append(
+                {
+                    "id": r.id,
+                    "title": r.title,
+                    "topic": r.topic.value if hasattr(r.topic, "value") else str(r.topic),
+                    "photo_path": get_public_url_or_presigned(r.photo_path) if r.photo_path else None,
+                    "srcset": images.image_srcset(r.photo_path, r.photo_widths),
+                    "description": r.description,
+                    "ingredients": [
+                        {"name": i.name, "quantity": i.quantity} for i in r.ingredients
+                    ],
+                    "likes_count": r.likes_count,
+                    "liked_by_me": (r.id in liked) if liked is not None else None,
+                }
+            )
     return {
         "id": current_user.id,
         "email": current_user.email,
@@ -48,12 +78,13 @@ async def get_me(db: AsyncSession, *, current_user: User) -> dict:
         "nickname": current_user.nickname,
         "full_name": current_user.full_name,
         "photo_path": get_public_url_or_presigned(current_user.photo_path) if current_user.photo_path else None,
+        "srcset": images.image_srcset(current_user.photo_path, current_user.photo_widths),
         "recipes": recipes,
     }
 
 
 async def get_public_profile(
-    db: AsyncSession, *, user_id: int, viewer: Optional[User]
+    db: AsyncSession, *, user_id: int, viewer: Optional[User], view: str = "full"
 ) -> dict:
     users_repo = UserRepository(db)
     recipes_repo = RecipeRepository(db)
@@ -61,33 +92,53 @@ async def get_public_profile(
     user = await users_repo.get(user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    recipes_rows = await recipes_repo.list_by_author(author_id=user.id)
-    recipes: list[dict] = []
-    for r in recipes_rows:
-        likes = await recipes_repo.likes_count(r.id)
-        liked_by_me = await recipes_repo.liked_by_user(
-            recipe_id=r.id, user_id=(viewer.id if viewer else None)
-        )
-        recipes.append(
-            {
-                "id": r.id,
-                "title": r.title,
-                "topic": r.topic.value if hasattr(r.topic, "value") else str(r.topic),
-                "photo_path": get_public_url_or_presigned(r.photo_path) if r.photo_path else None,
-                "likes_count": likes,
-                "liked_by_me": liked_by_me,
-            }
-        )
+    summary = view == "summary"
+    recipes_rows = await recipes_repo.list_by_author(author_id=user.id, summary=summary)
+    liked = await recipes_repo.liked_ids(
+        (r.id for r in recipes_rows), user_id=(viewer.id if viewer else None)
+    )
+    if summary:
+        recipes = _summary_cards(recipes_rows, liked)
+    else:
+        recipes = []
+        for r in recipes_rows:
+            recipes.append(
+                {
+                    "id": r.id,
+                    "title": r.title,
+                    "topic": r.topic.value if hasattr(r.topic, "value") else str(r.topic),
+                    "photo_path": get_public_url_or_presigned(r.photo_path) if r.photo_path else None,
+                    "srcset": images.image_srcset(r.photo_path, r.photo_widths),
+                    "likes_count": r.likes_count,
+                    "liked_by_me": (r.id in liked) if liked is not None else None,
+                }
+            )
     return {
         "id": user.id,
         "email": user.email,
         "nickname": user.nickname,
         "full_name": user.full_name,
         "photo_path": get_public_url_or_presigned(user.photo_path) if user.photo_path else None,
+        "srcset": images.image_srcset(user.photo_path, user.photo_widths),
         "recipes": recipes,
     }
 
 
+def _schedule_avatar_delete(db: AsyncSession, url: Optional[str]) -> None:
+    # commits together with the following users_repo.update
+    images.schedule_deletes(db, [url])
+
+
+async def _mark_avatar_derivatives(
+    user_id: int, url: str, db: AsyncSession, widths: List[int]
+) -> None:
+    await UserRepository(db).set_photo_widths(user_id, url, widths)
+
+
+def _enqueue_avatar_derivatives(user_id: int, url: Optional[str]) -> None:
+    images.enqueue(url, partial(_mark_avatar_derivatives, user_id, url))
+
+
 async def update_me_form(
     db: AsyncSession,
     *,
@@ -95,21 +146,26 @@ async def update_me_form(
     nickname: Optional[str],
     full_name: Optional[str],
     photo: Optional[UploadFile],
+    photo_key: Optional[str] = None,
 ):
     photo_url: Optional[str] = None
+    if photo is None and photo_key:
+        keyed = await resolve_keys(
+            db, [photo_key], kind="avatar", user_id=current_user.id
+        )
+        # resolve_keys rejects keys in use, so this is never the current avatar
+        photo_url = keyed[photo_key]
+        _schedule_avatar_delete(db, current_user.photo_path)
     if photo is not None:
         ext = os.path.splitext(photo.filename or "")[1].lower()
         if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
             raise HTTPException(status_code=400, detail="Invalid image type")
-        if current_user.photo_path:
-            try:
-                delete_file_by_url(current_user.photo_path)
-            except Exception:
-                pass
+        check_upload_size(photo.size)
         ts = int(time.time())
         key = f"avatars/{current_user.id}/avatar_{ts}{ext}"
-        data = await photo.read()
-        photo_url = upload_public_file(io.BytesIO(data), key)
+        # Upload first: a stream cut at the size limit must not cost the old avatar
+        photo_url = await upload_public_file_async(photo.file, key)
+        _schedule_avatar_delete(db, current_user.photo_path)
 
     users_repo = UserRepository(db)
     data: dict = {
@@ -117,7 +173,11 @@ async def update_me_form(
         "full_name": full_name,
         "photo_path": photo_url,
     }
-    user = await users_repo.update(current_user, {k: v for k, v in data.items() if v is not None})
+    data = {k: v for k, v in data.items() if v is not None}
+    if photo_url is not None:
+        data["photo_widths"] = None
+    user = await users_repo.update(current_user, data)
+    _enqueue_avatar_derivatives(user.id, photo_url)
     return user
 
 
@@ -142,17 +202,15 @@ async def upload_avatar(
     ext = os.path.splitext(file.filename or "")[1].lower()
     if ext not in {".jpg", ".jpeg", ".png", ".webp"}:
         raise HTTPException(status_code=400, detail="Invalid image type")
-    if current_user.photo_path:
-        try:
-            delete_file_by_url(current_user.photo_path)
-        except Exception:
-            pass
+    check_upload_size(file.size)
     ts = int(time.time())
     key = f"avatars/{current_user.id}/avatar_{ts}{ext}"
-    data = await file.read()
-    url = upload_public_file(io.BytesIO(data), key)
+    # Upload first: a stream cut at the size limit must not cost the old avatar
+    url = await upload_public_file_async(file.file, key)
+    _schedule_avatar_delete(db, current_user.photo_path)
     users_repo = UserRepository(db)
-    user = await users_repo.update(current_user, {"photo_path": url})
+    user = await users_repo.update(current_user, {"photo_path": url, "photo_widths": None})
+    _enqueue_avatar_derivatives(user.id, url)
     # Return processed URL that's accessible
     return PhotoResponse(photo_path=get_public_url_or_presigned(user.photo_path) if user.photo_path else None)
 
@@ -160,12 +218,9 @@ async def upload_avatar(
 async def delete_avatar(db: AsyncSession, *, current_user: User) -> dict:
     if not current_user.photo_path:
         return {"deleted": False}
-    try:
-        delete_file_by_url(current_user.photo_path)
-    except Exception:
-        pass
+    _schedule_avatar_delete(db, current_user.photo_path)
     users_repo = UserRepository(db)
-    await users_repo.update(current_user, {"photo_path": None})
+    await users_repo.update(current_user, {"photo_path": None, "photo_widths": None})
     return {"deleted": True}
 
 
@@ -23,7 +23,7 @@ async def get_current_user(
     token = credentials.credentials
     user_id = await auth_svc.validate_access_token(token)
     users_repo = UserRepository(db)
-    user = await users_repo.get(int(user_id))
+    user = await users_repo.get_lean(int(user_id))
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or missing user"
@@ -42,7 +42,7 @@ async def get_current_user_optional(
     if user_id is None:
         return None
     users_repo = UserRepository(db)
-    user = await users_repo.get(int(user_id))
+    user = await users_repo.get_lean(int(user_id))
     if user is None or not user.is_active:
         return None
     return user
@@ -1,11 +1,161 @@
-import json
 import smtplib
+import threading
+import time
+from collections import deque
 from email.message import EmailMessage
 from email.utils import formatdate, make_msgid
-
-import boto3
+from functools import lru_cache
+from typing import Any, Deque, Dict, Optional
 
 from backend.core.config import get_settings
+from backend.services.mail_queue import get_mail_queue
+
+
+class _Connection:
+    def __init__(self, server: smtplib.SMTP_SSL) -> None:
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self) -> None:
+        try:
+            self.server.quit()
+        except Exception:
+            self.server.close()
+
+
+class SMTPPool:
+    """Пул SMTP_SSL-соединений с уже выполненным login.
+
+    Потоки-отправители берут соединение, шлют письмо и возвращают его.
+    Простоявшее дольше noop_after соединение проверяется NOOP; после
+    max_messages писем соединение закрывается (лимиты провайдеров).
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        port: int,
+        user: str,
+        password: str,
+        size: int,
+        max_messages: int,
+        noop_after: float,
+        timeout: float,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.size = max(1, size)
+        self.max_messages = max(1, max_messages)
+        self.noop_after = noop_after
+        self.timeout = timeout
+        self._idle: Deque[_Connection] = deque()
+        self._opened = 0
+        self._cond = threading.Condition()
+
+    def _connect(self) -> _Connection:
+        server = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        try:
+            server.login(self.user, self.password)
+        except Exception:
+            server.close()
+            raise
+        return _Connection(server)
+
+    def _acquire(self) -> Optional[_Connection]:
+        """Свободное соединение или None, если можно открыть новое."""
+        with self._cond:
+            while not self._idle and self._opened >= self.size:
+                self._cond.wait()
+            if self._idle:
+                # LIFO: the most recently used connection is the least stale
+                return self._idle.pop()
+            self._opened += 1
+            return None
+
+    def _release(self, conn: Optional[_Connection]) -> None:
+        with self._cond:
+            if conn is None:
+                self._opened -= 1
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.append(conn)
+            self._cond.notify()
+
+    def _is_alive(self, conn: _Connection) -> bool:
+        if time.monotonic() - conn.last_used < self.noop_after:
+            return True
+        try:
+            return conn.server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def send(self, msg: EmailMessage) -> None:
+        conn = self._acquire()
+        try:
+            if conn is not None and not self._is_alive(conn):
+                conn.close()
+                conn = None
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect()
+            try:
+                conn.server.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                if not reused:
+                    raise
+                # The server dropped a pooled connection between NOOP and send
+                conn.close()
+                conn = self._connect()
+                conn.server.send_message(msg)
+            conn.sent += 1
+            if conn.sent >= self.max_messages:
+                conn.close()
+                conn = None
+        except Exception as e:
+            # Refused sender/recipients and data errors come after smtplib's
+            # RSET, so the session is still usable; only a broken transport
+            # (SMTPServerDisconnected, socket OSError) or an unexpected error
+            # costs the connection
+            keep = isinstance(e, smtplib.SMTPException) and not isinstance(
+                e, smtplib.SMTPServerDisconnected
+            )
+            if conn is not None and not keep:
+                conn.close()
+                conn = None
+            raise
+        finally:
+            self._release(conn)
+
+    def close(self) -> None:
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            conn.close()
+
+
+@lru_cache(maxsize=1)
+def _smtp_pool() -> SMTPPool:
+    settings = get_settings()
+    return SMTPPool(
+        host=settings.smtp_host,
+        port=settings.smtp_port,
+        user=settings.smtp_user,
+        password=settings.smtp_password,
+        size=settings.smtp_pool_size,
+        max_messages=settings.smtp_max_messages_per_connection,
+        noop_after=settings.smtp_noop_after_seconds,
+        timeout=settings.smtp_timeout_seconds,
+    )
+
+
+def close_smtp_pool() -> None:
+    _smtp_pool().close()
 
 
 def send_verification_email(to_email: str, code: str) -> None:
@@ -35,9 +185,7 @@ def send_verification_email(to_email: str, code: str) -> None:
         print(f"[DEV] Would send code {code} to {to_email}")
         return
 
-    with smtplib.SMTP_SSL(settings.smtp_host, settings.smtp_port) as server:
-        server.login(settings.smtp_user, settings.smtp_password)
-        server.send_message(msg)
+    _smtp_pool().send(msg)
 
 
 def send_reset_email(to_email: str, link: str) -> None:
@@ -79,45 +227,51 @@ def send_reset_email(to_email: str, link: str) -> None:
         print(f"[DEV] Would send reset link to {to_email}: {link}")
         return
 
-    with smtplib.SMTP_SSL(settings.smtp_host, settings.smtp_port) as server:
-        server.login(settings.smtp_user, settings.smtp_password)
-        server.send_message(msg)
+    _smtp_pool().send(msg)
 
 
-def publish_verification_email(to_email: str, code: str) -> None:
-    settings = get_settings()
-    if not (
-        settings.mq_queue_url
-        and settings.mq_access_key_id
-        and settings.mq_secret_access_key
-    ):
-        return send_verification_email(to_email, code)
-
-    sqs = boto3.client(
-        "sqs",
-        endpoint_url=settings.mq_endpoint or None,
-        region_name=settings.mq_region,
-        aws_access_key_id=settings.mq_access_key_id,
-        aws_secret_access_key=settings.mq_secret_access_key,
-    )
-    body = json.dumps({"type": "email_verification", "to": to_email, "code": code})
-    sqs.send_message(QueueUrl=settings.mq_queue_url, MessageBody=body)
+def is_transient_error(exc: BaseException) -> bool:
+    """Стоит ли повторять отправку: обрыв связи, сеть, 4xx от сервера.
 
+    Отказ получателя, ошибка логина, 5xx и прочие ошибки — навсегда.
+    """
+    if isinstance(exc, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(exc, smtplib.SMTPResponseException):
+        return 400 <= exc.smtp_code < 500
+    if isinstance(exc, smtplib.SMTPException):
+        # SMTPRecipientsRefused and the rest; SMTPException subclasses OSError
+        return False
+    return isinstance(exc, OSError)
 
-def publish_reset_email(to_email: str, link: str) -> None:
-    settings = get_settings()
-    if not (
-        settings.mq_queue_url
-        and settings.mq_access_key_id
-        and settings.mq_secret_access_key
-    ):
-        return send_reset_email(to_email, link)
-    sqs = boto3.client(
-        "sqs",
-        endpoint_url=settings.mq_endpoint or None,
-        region_name=settings.mq_region,
-        aws_access_key_id=settings.mq_access_key_id,
-        aws_secret_access_key=settings.mq_secret_access_key,
+
+def deliver_event(body: Dict[str, Any]) -> Optional[str]:
+    """Отправляет письмо по событию очереди; общий обработчик для воркера
+    (SQS / Redis) и локальной доставки.
+
+    Неизвестные типы и события без нужных полей пропускаются (None);
+    иначе возвращается строка для лога.
+    """
+    msg_type = body.get("type")
+    to = body.get("to")
+    if msg_type == "email_verification":
+        code = body.get("code")
+        if to and code:
+            send_verification_email(to, code)
+            return f"Verification code for {to}: {code}"
+    elif msg_type == "password_reset":
+        link = body.get("link")
+        if to and link:
+            send_reset_email(to, link)
+            return f"Password reset link for {to}: {link}"
+    return None
+
+
+async def publish_verification_email(to_email: str, code: str) -> None:
+    get_mail_queue().publish(
+        {"type": "email_verification", "to": to_email, "code": code}
     )
-    body = json.dumps({"type": "password_reset", "to": to_email, "link": link})
-    sqs.send_message(QueueUrl=settings.mq_queue_url, MessageBody=body)
+
+
+async def publish_reset_email(to_email: str, link: str) -> None:
+    get_mail_queue().publish({"type": "password_reset", "to": to_email, "link": link})
@@ -0,0 +1,155 @@
+"""Уменьшенные копии фотографий (derivatives) для srcset.
+
+После загрузки оригинала сервис ставит задачу в пул процессов: ресайз
+Pillow — CPU-bound и не должен занимать event loop или GIL API-процесса.
+Копии лежат рядом с оригиналом под детерминированными именами
+(cover.jpg -> cover_w320.webp, cover_w320.jpg), а список готовых ширин
+записывается в photo_widths строки — только тогда API отдаёт srcset.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import multiprocessing
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from PIL import Image, ImageOps
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.core.config import get_settings
+from backend.db.session import AsyncSessionLocal
+from backend.repositories.pending_deletes import PendingDeleteRepository
+from backend.services.storage import (
+    get_public_url_or_presigned,
+    get_s3_client,
+    key_from_url,
+)
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1280)
+# format -> (extension, Pillow format, save options)
+FORMATS = {
+    "webp": (".webp", "WEBP", {"quality": 80, "method": 4}),
+    "jpeg": (".jpg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def derivative_key(key: str, width: int, fmt: str) -> str:
+    stem, _ = posixpath.splitext(key)
+    return f"{stem}_w{width}{FORMATS[fmt][0]}"
+
+
+def derivative_url(url: str, width: int, fmt: str) -> str:
+    key = key_from_url(url)
+    prefix = url[: -len(key)] if key and url.endswith(key) else ""
+    return prefix + derivative_key(key, width, fmt)
+
+
+def with_derivatives(urls: Iterable[Optional[str]]) -> List[str]:
+    """URL'ы вместе со всеми возможными копиями — для удаления."""
+    result: List[str] = []
+    for url in urls:
+        if not url:
+            continue
+        result.append(url)
+        result.extend(
+            derivative_url(url, width, fmt) for width in WIDTHS for fmt in FORMATS
+        )
+    return result
+
+
+def schedule_deletes(db: AsyncSession, urls: Iterable[Optional[str]]) -> None:
+    """Фото и их копии -> pending_deletes; коммитит вызывающий код."""
+    PendingDeleteRepository(db).add_keys(
+        key_from_url(url) for url in with_derivatives(urls)
+    )
+
+
+def image_srcset(
+    url: Optional[str], widths: Optional[List[int]]
+) -> Optional[Dict[str, str]]:
+    """{"webp": "<url> 320w, <url> 640w", "jpeg": ...} или None, пока копий нет."""
+    if not url or not widths:
+        return None
+    return {
+        fmt: ", ".join(
+            f"{get_public_url_or_presigned(derivative_url(url, w, fmt))} {w}w"
+            for w in sorted(widths)
+        )
+        for fmt in FORMATS
+    }
+
+
+def generate_derivatives(url: str) -> List[int]:
+    """Выполняется в дочернем процессе: скачивает оригинал, пишет копии в S3.
+
+    Возвращает ширины, которые удалось сделать (без увеличения мелких фото).
+    """
+    s = get_settings()
+    client = get_s3_client()
+    key = key_from_url(url)
+    body = client.get_object(Bucket=s.s3_bucket, Key=key)["Body"].read()
+
+    with Image.open(io.BytesIO(body)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    widths = [w for w in WIDTHS if w < image.width]
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt, (_, pil_format, options) in FORMATS.items():
+            buf = io.BytesIO()
+            resized.save(buf, pil_format, **options)
+            buf.seek(0)
+            client.put_object(
+                Bucket=s.s3_bucket,
+                Key=derivative_key(key, width, fmt),
+                Body=buf,
+                ContentType="image/webp" if fmt == "webp" else "image/jpeg",
+            )
+    return widths
+
+
+@lru_cache(maxsize=1)
+def _pool() -> ProcessPoolExecutor:
+    # spawn: the API process runs threads (boto3 pool, asyncio), fork is unsafe
+    return ProcessPoolExecutor(
+        max_workers=get_settings().image_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+# Strong references so running jobs are not garbage-collected
+_jobs: set[asyncio.Task] = set()
+
+
+def enqueue(
+    url: Optional[str],
+    on_ready: Callable[[AsyncSession, List[int]], Awaitable[None]],
+) -> None:
+    """Ставит генерацию копий в пул; on_ready(db, widths) вызывается со своей сессией."""
+    if not url:
+        return
+    task = asyncio.get_running_loop().create_task(_run_job(url, on_ready))
+    _jobs.add(task)
+    task.add_done_callback(_jobs.discard)
+
+
+async def _run_job(
+    url: str, on_ready: Callable[[AsyncSession, List[int]], Awaitable[None]]
+) -> None:
+    try:
+        widths = await asyncio.get_running_loop().run_in_executor(
+            _pool(), generate_derivatives, url
+        )
+        if not widths:
+            return
+        async with AsyncSessionLocal() as db:
+            await on_ready(db, widths)
+    except Exception:
+        logger.exception("Image derivatives failed for %s", url)
@@ -0,0 +1,41 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class InProcessIndex(ABC):
+    """Основа для индексов в памяти процесса, которые строятся из БД.
+
+    Первый запрос ждёт загрузки; дальше данные отдаются сразу, а полная
+    перезагрузка раз в refresh_seconds идёт фоновой задачей и подхватывает
+    изменения, сделанные другими процессами.
+    """
+
+    def __init__(self, refresh_seconds: int) -> None:
+        self.refresh_seconds = refresh_seconds
+        self._loaded_at: Optional[float] = None
+        self._reload_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    async def ensure_fresh(self) -> None:
+        if self._loaded_at is None:
+            async with self._lock:
+                if self._loaded_at is None:
+                    await self._reload()
+            return
+        stale = time.monotonic() - self._loaded_at > self.refresh_seconds
+        if stale and (self._reload_task is None or self._reload_task.done()):
+            self._reload_task = asyncio.create_task(self._reload())
+
+    async def _reload(self) -> None:
+        await self._load()
+        self._loaded_at = time.monotonic()
+
+    @abstractmethod
+    async def _load(self) -> None:
+        """Полная загрузка данных индекса из БД."""
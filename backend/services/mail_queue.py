@@ -0,0 +1,236 @@
+"""Асинхронная публикация почтовых событий в очередь (SQS или Redis Streams).
+
+Обработчики запросов кладут событие в ограниченную asyncio.Queue и сразу
+возвращаются; фоновая задача собирает пачки до 10 сообщений и отправляет
+их одним вызовом транспорта (send_message_batch / pipeline XADD) в пуле
+потоков. Переполненная очередь — 503, а не ожидание: регистрация не
+должна зависеть от брокера.
+
+Без очереди события доставляет LocalMailDelivery: несколько фоновых задач
+отправляют письма через SMTP-пул в потоках, с повторами при ошибках.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core.config import get_settings
+from backend.core.errors import ErrorCode, http_error
+from backend.services.mq_transport import (
+    SQS_BATCH_SIZE,
+    get_transport,
+    queue_configured,
+)
+
+logger = logging.getLogger(__name__)
+
+class MailPublisher:
+    def __init__(self, *, max_size: int, linger_seconds: float, retries: int) -> None:
+        self.max_size = max_size
+        self.linger_seconds = linger_seconds
+        self.retries = retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # transport calls (boto3, redis) are blocking; one thread is enough for a single flusher
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="mail-publisher"
+        )
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_size)
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Дожидается отправки буфера (не дольше timeout) и гасит задачу."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Mail publisher stopped with %d events unsent", self._queue.qsize()
+            )
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def publish(self, body: Dict[str, Any]) -> None:
+        """Кладёт событие в буфер без ожидания; 503, если буфер полон."""
+        self.start()
+        try:
+            self._queue.put_nowait(body)
+        except asyncio.QueueFull:
+            raise http_error(ErrorCode.MAIL_QUEUE_FULL)
+
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.linger_seconds
+        while len(batch) < SQS_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush_loop(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._send(batch)
+            except Exception:
+                logger.exception("Failed to publish %d mail events", len(batch))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send(self, batch: List[Dict[str, Any]]) -> None:
+        entries = {uuid.uuid4().hex: json.dumps(body) for body in batch}
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.retries + 1):
+            if attempt:
+                await asyncio.sleep(0.2 * 2**attempt)
+            try:
+                failed = await loop.run_in_executor(
+                    self._executor, get_transport().publish, entries
+                )
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                continue
+            entries = {k: v for k, v in entries.items() if k in failed}
+            if not entries:
+                return
+        logger.error("Queue rejected %d mail events after retries", len(entries))
+
+
+class LocalMailDelivery:
+    """Доставка в процессе API, когда очередь не настроена.
+
+    Письма уходят из фоновых задач (не больше concurrency одновременно),
+    поэтому время ответа регистрации не зависит от SMTP-сервера.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[Dict[str, Any]], None],
+        *,
+        is_transient: Callable[[BaseException], bool],
+        max_size: int,
+        concurrency: int,
+        retries: int,
+    ) -> None:
+        self.deliver = deliver
+        self.is_transient = is_transient
+        self.max_size = max_size
+        self.concurrency = max(1, concurrency)
+        self.retries = retries
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [task for task in self._tasks if not task.done()]
+        loop = asyncio.get_running_loop()
+        while len(self._tasks) < self.concurrency:
+            self._tasks.append(loop.create_task(self._consume()))
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Mail delivery stopped with %d events unsent", self._queue.qsize()
+            )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def publish(self, body: Dict[str, Any]) -> None:
+        self.start()
+        try:
+            self._queue.put_nowait(body)
+        except asyncio.QueueFull:
+            raise http_error(ErrorCode.MAIL_QUEUE_FULL)
+
+    async def _consume(self) -> None:
+        while True:
+            body = await self._queue.get()
+            try:
+                await self._deliver_with_retries(body)
+            finally:
+                self._queue.task_done()
+
+    async def _deliver_with_retries(self, body: Dict[str, Any]) -> None:
+        for attempt in range(self.retries + 1):
+            try:
+                # SMTP is blocking; the pool in services.email is thread-safe
+                await asyncio.to_thread(self.deliver, body)
+                return
+            except Exception as e:
+                # Permanent failures (refused recipient, bad login, 5xx)
+                # would fail the same way on every retry
+                if attempt == self.retries or not self.is_transient(e):
+                    logger.exception(
+                        "Giving up on %s mail to %s", body.get("type"), body.get("to")
+                    )
+                    return
+                await asyncio.sleep(2**attempt)
+
+
+@lru_cache(maxsize=1)
+def get_publisher() -> MailPublisher:
+    s = get_settings()
+    return MailPublisher(
+        max_size=s.mail_queue_max_size,
+        linger_seconds=s.mail_flush_linger_seconds,
+        retries=s.mail_publish_retries,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_local_delivery() -> LocalMailDelivery:
+    # services.email imports this module for get_mail_queue
+    from backend.services.email import deliver_event, is_transient_error
+
+    s = get_settings()
+    return LocalMailDelivery(
+        deliver_event,
+        is_transient=is_transient_error,
+        max_size=s.mail_queue_max_size,
+        concurrency=s.mail_delivery_concurrency,
+        retries=s.mail_delivery_retries,
+    )
+
+
+def get_mail_queue():
+    """Публикатор в очередь или локальная доставка — по настройкам."""
+    return get_publisher() if queue_configured() else get_local_delivery()
+
+
+def start() -> None:
+    get_mail_queue().start()
+
+
+async def stop() -> None:
+    await get_mail_queue().stop()
@@ -0,0 +1,259 @@
+"""Транспорт очереди почтовых событий: SQS или Redis Streams.
+
+Воркер (workers/mq_worker.py) и публикатор API (services/mail_queue.py)
+работают через один интерфейс, а бэкенд выбирается настройкой
+mq_transport. Семантика повторяет SQS: полученное сообщение невидимо
+другим потребителям visibility секунд, его нужно подтвердить (ack) или
+продлить (extend); неподтверждённое выдаётся снова.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Sequence
+
+import boto3
+import redis
+from redis.exceptions import ResponseError
+
+from backend.core.config import get_settings
+
+# SQS batch APIs (send, receive, delete, change visibility) accept at most 10
+SQS_BATCH_SIZE = 10
+
+
+class Message(NamedTuple):
+    # SQS receipt handle or Redis stream entry id
+    handle: str
+    body: str
+
+
+class MQTransport(ABC):
+    @abstractmethod
+    def receive(
+        self, max_messages: int, wait_seconds: int, visibility: int
+    ) -> List[Message]:
+        """До max_messages сообщений, ожидая не дольше wait_seconds."""
+
+    @abstractmethod
+    def ack(self, handles: Sequence[str]) -> int:
+        """Подтверждает обработку; возвращает число неподтверждённых."""
+
+    @abstractmethod
+    def extend(self, handles: Sequence[str], visibility: int) -> None:
+        """Продлевает невидимость сообщений ещё на visibility секунд."""
+
+    @abstractmethod
+    def publish(self, bodies: Dict[str, str]) -> set[str]:
+        """Отправляет {id: body}; возвращает id, которые не приняты."""
+
+
+class SQSTransport(MQTransport):
+    def __init__(self) -> None:
+        s = get_settings()
+        self.queue_url = s.mq_queue_url
+        self.sqs = boto3.client(
+            "sqs",
+            endpoint_url=s.mq_endpoint or None,
+            region_name=s.mq_region,
+            aws_access_key_id=s.mq_access_key_id,
+            aws_secret_access_key=s.mq_secret_access_key,
+        )
+
+    def receive(
+        self, max_messages: int, wait_seconds: int, visibility: int
+    ) -> List[Message]:
+        resp = self.sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(SQS_BATCH_SIZE, max_messages),
+            WaitTimeSeconds=wait_seconds,
+            VisibilityTimeout=visibility,
+        )
+        return [Message(m["ReceiptHandle"], m["Body"]) for m in resp.get("Messages", [])]
+
+    def ack(self, handles: Sequence[str]) -> int:
+        failed = 0
+        for start in range(0, len(handles), SQS_BATCH_SIZE):
+            batch = handles[start : start + SQS_BATCH_SIZE]
+            resp = self.sqs.delete_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": handle}
+                    for i, handle in enumerate(batch)
+                ],
+            )
+            failed += len(resp.get("Failed", []))
+        return failed
+
+    def extend(self, handles: Sequence[str], visibility: int) -> None:
+        for start in range(0, len(handles), SQS_BATCH_SIZE):
+            batch = handles[start : start + SQS_BATCH_SIZE]
+            self.sqs.change_message_visibility_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": handle, "VisibilityTimeout": visibility}
+                    for i, handle in enumerate(batch)
+                ],
+            )
+
+    def publish(self, bodies: Dict[str, str]) -> set[str]:
+        failed: set[str] = set()
+        items = list(bodies.items())
+        for start in range(0, len(items), SQS_BATCH_SIZE):
+            resp = self.sqs.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": id_, "MessageBody": body}
+                    for id_, body in items[start : start + SQS_BATCH_SIZE]
+                ],
+            )
+            failed.update(f["Id"] for f in resp.get("Failed", []))
+        return failed
+
+
+class RedisStreamTransport(MQTransport):
+    """Redis Streams с consumer group: реплики воркера делят поток между собой.
+
+    Видимость — это idle time записи в PEL группы: зависшие дольше
+    visibility записи забираются XAUTOCLAIM, продление — XCLAIM на себя,
+    который обнуляет idle time. Запись, выданная больше max_deliveries раз,
+    уходит в поток "<stream>:dead" и подтверждается — аналог redrive в SQS.
+    """
+
+    def __init__(self) -> None:
+        s = get_settings()
+        self.stream = s.mq_stream
+        self.group = s.mq_stream_group
+        self.maxlen = s.mq_stream_maxlen
+        self.max_deliveries = s.mq_max_deliveries
+        self.dead_stream = f"{s.mq_stream}:dead"
+        self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+        self.redis = redis.Redis.from_url(s.redis_url, decode_responses=True)
+        self._claim_cursor = "0-0"
+        self._group_ready = False
+
+    def _ensure_group(self) -> None:
+        if self._group_ready:
+            return
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def receive(
+        self, max_messages: int, wait_seconds: int, visibility: int
+    ) -> List[Message]:
+        self._ensure_group()
+        # Entries of crashed or stalled consumers come back first
+        self._claim_cursor, claimed, *_ = self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            self.consumer,
+            min_idle_time=visibility * 1000,
+            start_id=self._claim_cursor,
+            count=max_messages,
+        )
+        messages = self._drop_poisoned(
+            [Message(id_, fields["body"]) for id_, fields in claimed if fields]
+        )
+        if len(messages) < max_messages:
+            resp = self.redis.xreadgroup(
+                self.group,
+                self.consumer,
+                {self.stream: ">"},
+                count=max_messages - len(messages),
+                # block=0 would wait forever; don't wait when reclaim found work
+                block=None if messages or not wait_seconds else wait_seconds * 1000,
+            )
+            for _, entries in resp or []:
+                messages.extend(Message(id_, fields["body"]) for id_, fields in entries)
+        return messages
+
+    def _drop_poisoned(self, claimed: List[Message]) -> List[Message]:
+        """Переносит в dead-поток записи, исчерпавшие max_deliveries."""
+        if not claimed:
+            return claimed
+        pipe = self.redis.pipeline(transaction=False)
+        for message in claimed:
+            pipe.xpending_range(
+                self.stream, self.group, min=message.handle, max=message.handle, count=1
+            )
+        deliveries = {
+            entry["message_id"]: entry["times_delivered"]
+            for pending in pipe.execute()
+            for entry in pending
+        }
+        dead = [
+            m for m in claimed if deliveries.get(m.handle, 0) > self.max_deliveries
+        ]
+        if not dead:
+            return claimed
+        pipe = self.redis.pipeline(transaction=True)
+        for message in dead:
+            pipe.xadd(
+                self.dead_stream,
+                {
+                    "body": message.body,
+                    "source_id": message.handle,
+                    "deliveries": deliveries[message.handle],
+                },
+                maxlen=self.maxlen,
+                approximate=True,
+            )
+        handles = [m.handle for m in dead]
+        pipe.xack(self.stream, self.group, *handles)
+        pipe.xdel(self.stream, *handles)
+        pipe.execute()
+        return [m for m in claimed if m not in dead]
+
+    def ack(self, handles: Sequence[str]) -> int:
+        if not handles:
+            return 0
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.xack(self.stream, self.group, *handles)
+        # Single consumer group: acknowledged entries are not needed anymore
+        pipe.xdel(self.stream, *handles)
+        acked, _ = pipe.execute()
+        return len(handles) - acked
+
+    def extend(self, handles: Sequence[str], visibility: int) -> None:
+        if handles:
+            self.redis.xclaim(
+                self.stream,
+                self.group,
+                self.consumer,
+                min_idle_time=0,
+                message_ids=list(handles),
+                justid=True,
+            )
+
+    def publish(self, bodies: Dict[str, str]) -> set[str]:
+        pipe = self.redis.pipeline(transaction=False)
+        for body in bodies.values():
+            pipe.xadd(
+                self.stream, {"body": body}, maxlen=self.maxlen, approximate=True
+            )
+        pipe.execute()
+        return set()
+
+
+def queue_configured() -> bool:
+    s = get_settings()
+    if s.mq_transport == "redis":
+        return bool(s.redis_url)
+    return bool(s.mq_queue_url and s.mq_access_key_id and s.mq_secret_access_key)
+
+
+@lru_cache(maxsize=1)
+def get_transport() -> MQTransport:
+    transport = get_settings().mq_transport
+    if transport == "redis":
+        return RedisStreamTransport()
+    if transport == "sqs":
+        return SQSTransport()
+    raise ValueError(f"Unknown mq_transport: {transport!r}")
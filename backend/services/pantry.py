@@ -0,0 +1,146 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Mapping
+
+import numpy as np
+
+from backend.core.config import get_settings
+from backend.core.text import term_tokens
+from backend.db.session import AsyncSessionLocal
+from backend.repositories.recipes import RecipeRepository
+from backend.services.inprocess_index import InProcessIndex
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+class PantryIndex(InProcessIndex):
+    """Инвертированный индекс: id ингредиента из словаря -> отсортированные id рецептов.
+
+    Продукты пользователя сопоставляются с ингредиентами по токенам: основа
+    каждого слова продукта должна встречаться в названии ингредиента, так что
+    "tomato" покрывает "cherry tomatoes". Рядом лежит плотный вектор
+    totals[recipe_id] — число различных ингредиентов рецепта. Покрытие для
+    набора продуктов считается одним bincount по склеенным спискам и делением
+    на totals, без загрузки рецептов из БД.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(get_settings().suggest_refresh_seconds)
+        self._postings: Dict[int, np.ndarray] = {}
+        self._terms: Dict[int, frozenset[int]] = {}
+        self._totals = _EMPTY
+        # token -> ids of dictionary ingredients whose name contains it
+        self._by_token: Dict[str, set[int]] = defaultdict(set)
+        self._indexed: set[int] = set()
+
+    def _index_names(self, ingredients: Mapping[str, int]) -> None:
+        for name, ingredient_id in ingredients.items():
+            if ingredient_id not in self._indexed:
+                self._indexed.add(ingredient_id)
+                for token in term_tokens(name):
+                    self._by_token[token].add(ingredient_id)
+
+    def _match(self, have: Iterable[str]) -> set[int]:
+        """Ингредиенты, в названии которых есть все токены хотя бы одного продукта."""
+        matched: set[int] = set()
+        for item in have:
+            tokens = term_tokens(item)
+            if tokens:
+                matched |= set.intersection(
+                    *(self._by_token.get(t, set()) for t in tokens)
+                )
+        return matched
+
+    async def rank(
+        self, have: Iterable[str], *, limit: int, min_coverage: float = 0.0
+    ) -> List[tuple[int, float, int, int]]:
+        """Рецепты по доле покрытых ингредиентов: (recipe_id, coverage, matched, total)."""
+        await self.ensure_fresh()
+        terms = self._match(have)
+        lists = [self._postings[t] for t in terms if t in self._postings]
+        if not lists:
+            return []
+        totals = self._totals
+        hits = np.bincount(np.concatenate(lists), minlength=len(totals))[: len(totals)]
+        candidates = np.flatnonzero(hits)
+        matched = hits[candidates]
+        total = totals[candidates]
+        coverage = matched / np.maximum(total, 1)
+        keep = coverage >= min_coverage
+        candidates, matched, total, coverage = (
+            candidates[keep],
+            matched[keep],
+            total[keep],
+            coverage[keep],
+        )
+        # Покрытие ↓, затем число совпавших ↓, затем более новые рецепты
+        order = np.lexsort((-candidates, -matched, -coverage))[:limit]
+        return [
+            (int(candidates[i]), float(coverage[i]), int(matched[i]), int(total[i]))
+            for i in order
+        ]
+
+    def set_recipe(self, recipe_id: int, ingredients: Mapping[str, int]) -> None:
+        """ingredients — нормализованное имя -> id словарного ингредиента."""
+        if not self.loaded:
+            return
+        self._index_names(ingredients)
+        new = frozenset(ingredients.values())
+        old = self._terms.get(recipe_id, frozenset())
+        one = np.array([recipe_id], dtype=np.int32)
+        for term in old - new:
+            remaining = np.setdiff1d(self._postings[term], one, assume_unique=True)
+            if remaining.size:
+                self._postings[term] = remaining
+            else:
+                del self._postings[term]
+        for term in new - old:
+            self._postings[term] = np.union1d(self._postings.get(term, _EMPTY), one)
+        if recipe_id >= len(self._totals):
+            grown = np.zeros(max(recipe_id + 1, 2 * len(self._totals)), dtype=np.int32)
+            grown[: len(self._totals)] = self._totals
+            self._totals = grown
+        self._totals[recipe_id] = len(new)
+        if new:
+            self._terms[recipe_id] = new
+        else:
+            self._terms.pop(recipe_id, None)
+
+    async def _load(self) -> None:
+        async with AsyncSessionLocal() as db:
+            rows = await RecipeRepository(db).ingredient_names()
+        by_recipe: Dict[int, set[int]] = defaultdict(set)
+        names: Dict[str, int] = {}
+        for recipe_id, ingredient_id, name in rows:
+            by_recipe[recipe_id].add(ingredient_id)
+            names[name] = ingredient_id
+        postings: Dict[int, List[int]] = defaultdict(list)
+        totals = np.zeros(max(by_recipe, default=0) + 1, dtype=np.int32)
+        for recipe_id, recipe_terms in by_recipe.items():
+            totals[recipe_id] = len(recipe_terms)
+            for term in recipe_terms:
+                postings[term].append(recipe_id)
+        self._postings = {
+            term: np.array(sorted(ids), dtype=np.int32) for term, ids in postings.items()
+        }
+        self._terms = {rid: frozenset(t) for rid, t in by_recipe.items()}
+        self._totals = totals
+        self._by_token = defaultdict(set)
+        self._indexed = set()
+        self._index_names(names)
+
+
+_index = PantryIndex()
+
+
+async def rank(
+    have: Iterable[str], *, limit: int, min_coverage: float = 0.0
+) -> List[tuple[int, float, int, int]]:
+    return await _index.rank(have, limit=limit, min_coverage=min_coverage)
+
+
+def note_recipe(recipe_id: int, ingredients: Mapping[str, int]) -> None:
+    _index.set_recipe(recipe_id, ingredients)
+
+
+def forget_recipe(recipe_id: int) -> None:
+    _index.set_recipe(recipe_id, {})
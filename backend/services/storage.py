@@ -1,12 +1,24 @@
+import asyncio
 import mimetypes
-from typing import BinaryIO
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Sequence, TypeVar
 
 import boto3
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from fastapi import HTTPException
 
 from backend.core.config import get_settings
+from backend.core.errors import ErrorCode, http_error
+
+T = TypeVar("T")
 
 
 def get_s3_client():
@@ -16,20 +28,119 @@ def get_s3_client():
             status_code=400,
             detail="File uploads are disabled. Configure S3_* settings in .env",
         )
+    return _shared_client()
+
+
+@lru_cache(maxsize=1)
+def _shared_client():
+    # boto3 clients are thread-safe; building one costs credential and
+    # endpoint resolution, so the process keeps a single instance
+    s = get_settings()
     return boto3.client(
         "s3",
         endpoint_url=s.s3_endpoint or None,
         region_name=s.s3_region,
         aws_access_key_id=s.s3_access_key_id,
         aws_secret_access_key=s.s3_secret_access_key,
-        config=Config(s3={"addressing_style": "path"}, signature_version="s3v4"),
+        config=Config(
+            s3={"addressing_style": "path"},
+            signature_version="s3v4",
+            # Socket-level limits so executor threads are freed even when the
+            # awaiting coroutine has already given up
+            connect_timeout=5,
+            read_timeout=s.s3_timeout_seconds,
+            # Each executor thread may run several multipart part uploads
+            max_pool_connections=s.s3_max_workers * s.s3_multipart_concurrency,
+        ),
+    )
+
+
+@lru_cache(maxsize=1)
+def _transfer_config() -> TransferConfig:
+    s = get_settings()
+    return TransferConfig(
+        multipart_threshold=s.s3_multipart_threshold_bytes,
+        multipart_chunksize=s.s3_multipart_chunk_bytes,
+        max_concurrency=s.s3_multipart_concurrency,
+    )
+
+
+class FileTooLargeError(Exception):
+    pass
+
+
+class LimitedReader:
+    """Read-only обёртка над файлом: считает байты и обрывает чтение сверх лимита.
+
+    Без seek, поэтому boto3 читает файл потоком, по частям, не загружая целиком.
+    """
+
+    def __init__(self, file_obj: BinaryIO, max_bytes: int):
+        self._file = file_obj
+        self._max_bytes = max_bytes
+        self._read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._file.read(size)
+        self._read += len(chunk)
+        if self._read > self._max_bytes:
+            raise FileTooLargeError(self._read)
+        return chunk
+
+
+@lru_cache(maxsize=1)
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(
+        max_workers=get_settings().s3_max_workers, thread_name_prefix="s3"
     )
 
 
-def upload_public_file(file_obj: BinaryIO, key: str) -> str:
+def check_upload_size(size: Optional[int]) -> None:
+    """Ранний отказ по известному размеру; во время загрузки лимит держит LimitedReader."""
+    if size is not None and size > get_settings().upload_max_bytes:
+        raise http_error(ErrorCode.FILE_TOO_LARGE)
+
+
+async def _run(fn: Callable[..., T], *args, timeout: Optional[float] = None) -> T:
+    """Выполняет блокирующий вызов boto3 в пуле потоков с дедлайном."""
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor(), partial(fn, *args))
+    try:
+        return await asyncio.wait_for(
+            future, timeout or get_settings().s3_timeout_seconds
+        )
+    except asyncio.TimeoutError:
+        raise http_error(ErrorCode.STORAGE_TIMEOUT)
+    except FileTooLargeError:
+        raise http_error(ErrorCode.FILE_TOO_LARGE)
+
+
+def public_url(key: str) -> str:
+    """URL объекта в том виде, в каком он хранится в БД."""
+    s = get_settings()
+    # Формируем публичный URL
+    # Убеждаемся, что endpoint не имеет завершающего слеша
+    base = s.s3_endpoint.rstrip("/")
+    # Формат: https://storage.yandexcloud.net/bucket-name/key/path
+    url = f"{base}/{s.s3_bucket}/{key}"
+
+    # Проверяем, что URL сформирован правильно
+    if not url.startswith("http"):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Invalid S3 URL format: {url}. Check S3_ENDPOINT in .env",
+        )
+    return url
+
+
+def upload_public_file(
+    file_obj: BinaryIO, key: str, *, max_bytes: Optional[int] = None
+) -> str:
     """
-    Загружает файл в S3 и возвращает публичный URL.
+    Загружает файл в S3 потоком и возвращает публичный URL.
     Использует настройки из .env (S3_BUCKET, S3_ENDPOINT и т.д.)
+    Файлы больше s3_multipart_threshold_bytes идут multipart-загрузкой с
+    параллельными частями; больше max_bytes — FileTooLargeError.
     """
     s = get_settings()
     if not (s.s3_bucket and s.s3_access_key_id and s.s3_secret_access_key):
@@ -50,29 +161,20 @@ def upload_public_file(file_obj: BinaryIO, key: str) -> str:
         content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
         
         # Загружаем файл в указанный бакет
-        client.put_object(
-            Bucket=s.s3_bucket,
-            Key=key,
-            Body=file_obj,
-            ContentType=content_type,
+        client.upload_fileobj(
+            LimitedReader(file_obj, max_bytes or s.upload_max_bytes),
+            s.s3_bucket,
+            key,
             # ACL не поддерживается в Яндекс Object Storage
             # Публичный доступ настраивается через политики бакета
+            ExtraArgs={"ContentType": content_type},
+            Config=_transfer_config(),
         )
         
-        # Формируем публичный URL
-        # Убеждаемся, что endpoint не имеет завершающего слеша
-        base = s.s3_endpoint.rstrip("/")
-        # Формат: https://storage.yandexcloud.net/bucket-name/key/path
-        url = f"{base}/{s.s3_bucket}/{key}"
-        
-        # Проверяем, что URL сформирован правильно
-        if not url.startswith("http"):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Invalid S3 URL format: {url}. Check S3_ENDPOINT in .env",
-            )
-        
-        return url
+        return public_url(key)
+    except S3UploadFailedError as e:
+        # Multipart errors come wrapped; the upload is already aborted
+        raise HTTPException(status_code=500, detail=f"S3 upload failed: {e}")
     except ClientError as e:
         error_code = e.response.get("Error", {}).get("Code", "Unknown")
         error_message = e.response.get("Error", {}).get("Message", str(e))
@@ -179,6 +281,61 @@ def get_presigned_url(key: str, expiration: int = 3600) -> str:
         )
 
 
+class PresignedUrlCache:
+    """TTL + LRU кэш presigned URL по ключу объекта.
+
+    TTL заметно короче срока подписи, поэтому отданная из кэша ссылка
+    остаётся рабочей ещё долго после выдачи.
+    """
+
+    def __init__(self, *, ttl_seconds: int, maxsize: int):
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._items: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            url, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return url
+
+    def put(self, key: str, url: str) -> None:
+        with self._lock:
+            self._items[key] = (url, time.monotonic() + self.ttl_seconds)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+@lru_cache(maxsize=1)
+def _presign_cache() -> PresignedUrlCache:
+    s = get_settings()
+    return PresignedUrlCache(
+        ttl_seconds=s.s3_presign_cache_ttl_seconds, maxsize=s.s3_presign_cache_size
+    )
+
+
+def get_cached_presigned_url(key: str) -> str:
+    """presigned URL из кэша процесса; подписывает заново только после TTL."""
+    cache = _presign_cache()
+    url = cache.get(key)
+    if url is None:
+        url = get_presigned_url(key, get_settings().s3_presign_expires_seconds)
+        cache.put(key, url)
+    return url
+
+
 def get_public_url_or_presigned(url: str) -> str:
     """
     Возвращает presigned URL для файла, если публичный доступ не настроен.
@@ -196,14 +353,59 @@ def get_public_url_or_presigned(url: str) -> str:
     if not key:
         return url
     
-    # Генерируем presigned URL
+    # Генерируем presigned URL (или берём из кэша)
     try:
-        return get_presigned_url(key)
+        return get_cached_presigned_url(key)
     except Exception:
         # Если не удалось сгенерировать presigned URL, возвращаем оригинальный URL
         return url
 
 
+def presigned_post(
+    key: str, *, content_type: str, max_bytes: int, expires_in: int
+) -> dict:
+    """Политика presigned POST: загрузка в key напрямую из браузера.
+
+    Бакет сам проверяет размер (content-length-range) и Content-Type.
+    Подпись локальная, без запросов к S3.
+    """
+    s = get_settings()
+    if not (s.s3_bucket and s.s3_access_key_id and s.s3_secret_access_key):
+        raise HTTPException(
+            status_code=400,
+            detail="File uploads are disabled. Configure S3_* settings in .env",
+        )
+    return get_s3_client().generate_presigned_post(
+        Bucket=s.s3_bucket,
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, max_bytes],
+        ],
+        ExpiresIn=expires_in,
+    )
+
+
+def object_exists(key: str) -> bool:
+    s = get_settings()
+    try:
+        get_s3_client().head_object(Bucket=s.s3_bucket, Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def delete_object(key: str) -> None:
+    s = get_settings()
+    if not (s.s3_bucket and s.s3_access_key_id and s.s3_secret_access_key):
+        return
+    get_s3_client().delete_object(Bucket=s.s3_bucket, Key=key)
+    _presign_cache().discard(key)
+
+
 def delete_file_by_url(url: str) -> None:
     if not url:
         return
@@ -213,3 +415,89 @@ def delete_file_by_url(url: str) -> None:
     client = get_s3_client()
     key = key_from_url(url)
     client.delete_object(Bucket=s.s3_bucket, Key=key)
+    _presign_cache().discard(key)
+
+
+# S3 DeleteObjects accepts at most 1000 keys per request
+DELETE_BATCH_SIZE = 1000
+
+
+def delete_objects(keys: Sequence[str]) -> set[str]:
+    """Пакетное удаление: возвращает ключи, которых в бакете больше нет.
+
+    Отсутствующий ключ (NoSuchKey) тоже считается удалённым; ключи с другими
+    ошибками в результат не попадают — их повторит следующий проход.
+    """
+    s = get_settings()
+    client = get_s3_client()
+    deleted: set[str] = set()
+    for start in range(0, len(keys), DELETE_BATCH_SIZE):
+        batch = keys[start : start + DELETE_BATCH_SIZE]
+        response = client.delete_objects(
+            Bucket=s.s3_bucket,
+            Delete={"Objects": [{"Key": key} for key in batch], "Quiet": False},
+        )
+        deleted.update(item["Key"] for item in response.get("Deleted", []))
+        deleted.update(
+            item["Key"]
+            for item in response.get("Errors", [])
+            if item.get("Code") == "NoSuchKey"
+        )
+    cache = _presign_cache()
+    for key in deleted:
+        cache.discard(key)
+    return deleted
+
+
+def list_objects(prefix: str) -> Iterator[tuple[str, datetime]]:
+    """(key, LastModified) всех объектов под префиксом, постранично."""
+    s = get_settings()
+    paginator = get_s3_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=s.s3_bucket, Prefix=prefix):
+        for item in page.get("Contents", []):
+            yield item["Key"], item["LastModified"]
+
+
+async def upload_public_file_async(
+    file_obj: BinaryIO, key: str, *, timeout: Optional[float] = None
+) -> str:
+    """upload_public_file без блокировки event loop."""
+    return await _run(upload_public_file, file_obj, key, timeout=timeout)
+
+
+async def delete_file_by_url_async(url: str, *, timeout: Optional[float] = None) -> None:
+    """delete_file_by_url без блокировки event loop."""
+    await _run(delete_file_by_url, url, timeout=timeout)
+
+
+async def upload_many(
+    items: Sequence[tuple[BinaryIO, str]], *, concurrency: Optional[int] = None
+) -> Dict[str, str]:
+    """Параллельная загрузка (не больше concurrency одновременно): ключ -> URL.
+
+    Если хоть одна загрузка не удалась, все ключи пачки удаляются и первая
+    ошибка пробрасывается — частично загруженных наборов не остаётся.
+    """
+    if not items:
+        return {}
+    semaphore = asyncio.Semaphore(concurrency or get_settings().s3_upload_concurrency)
+
+    async def upload(file_obj: BinaryIO, key: str) -> str:
+        async with semaphore:
+            return await upload_public_file_async(file_obj, key)
+
+    results = await asyncio.gather(
+        *(upload(file_obj, key) for file_obj, key in items), return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        # Timed-out uploads may still land, so every key of the batch is removed
+        await asyncio.gather(
+            *(_run(delete_object, key) for _, key in items), return_exceptions=True
+        )
+        raise errors[0]
+    return {key: url for (_, key), url in zip(items, results)}
+
+
+async def object_exists_async(key: str, *, timeout: Optional[float] = None) -> bool:
+    return await _run(object_exists, key, timeout=timeout)
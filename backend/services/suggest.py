@@ -0,0 +1,71 @@
+from bisect import bisect_left, insort
+from typing import Iterable, List, Optional
+
+from backend.core.config import get_settings
+from backend.core.text import normalize_term
+from backend.db.session import AsyncSessionLocal
+from backend.repositories.recipes import RecipeRepository
+from backend.services.inprocess_index import InProcessIndex
+
+
+class SuggestIndex(InProcessIndex):
+    """Отсортированный массив (ключ, вид, текст) для подсказок по префиксу.
+
+    Поиск — bisect по нормализованному ключу, без обращения к БД. Новые
+    названия добавляются сразу (add), остальное — фоновой перезагрузкой.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(get_settings().suggest_refresh_seconds)
+        self._entries: List[tuple[str, str, str]] = []
+
+    async def lookup(self, prefix: str, limit: int) -> List[tuple[str, str]]:
+        await self.ensure_fresh()
+        key = normalize_term(prefix)
+        if not key:
+            return []
+        entries = self._entries
+        result: List[tuple[str, str]] = []
+        i = bisect_left(entries, (key,))
+        while i < len(entries) and len(result) < limit:
+            entry_key, kind, text = entries[i]
+            if not entry_key.startswith(key):
+                break
+            result.append((kind, text))
+            i += 1
+        return result
+
+    def add(self, kind: str, texts: Iterable[str]) -> None:
+        if not self.loaded:
+            return
+        for text in texts:
+            entry = (normalize_term(text), kind, text)
+            if not entry[0]:
+                continue
+            i = bisect_left(self._entries, entry[:2])
+            if i < len(self._entries) and self._entries[i][:2] == entry[:2]:
+                continue
+            insort(self._entries, entry)
+
+    async def _load(self) -> None:
+        async with AsyncSessionLocal() as db:
+            terms = await RecipeRepository(db).suggest_terms()
+        entries = {}
+        for kind, text in terms:
+            key = normalize_term(text or "")
+            if key:
+                entries.setdefault((key, kind), text)
+        self._entries = sorted((key, kind, text) for (key, kind), text in entries.items())
+
+
+_index = SuggestIndex()
+
+
+async def suggest(prefix: str, limit: int) -> List[tuple[str, str]]:
+    return await _index.lookup(prefix, limit)
+
+
+def note_recipe(title: Optional[str], ingredient_names: Iterable[str] = ()) -> None:
+    if title:
+        _index.add("title", [title])
+    _index.add("ingredient", ingredient_names)
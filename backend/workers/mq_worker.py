@@ -1,56 +1,145 @@
 import json
-from typing import Any, Dict
-
-import boto3
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
 
 from backend.core.config import get_settings
-from backend.services.email import send_reset_email, send_verification_email
+from backend.services.email import close_smtp_pool, deliver_event
+from backend.services.mq_transport import SQS_BATCH_SIZE, Message, get_transport
 
 
 class MQWorker:
     def __init__(self) -> None:
         self.settings = get_settings()
-        self.sqs = boto3.client(
-            "sqs",
-            endpoint_url=self.settings.mq_endpoint,
-            region_name=self.settings.mq_region,
-            aws_access_key_id=self.settings.mq_access_key_id,
-            aws_secret_access_key=self.settings.mq_secret_access_key,
-        )
+        # SQS or Redis Streams, chosen by mq_transport
+        self.transport = get_transport()
+        self.threads = max(1, self.settings.mq_worker_threads)
+        self.visibility = self.settings.mq_visibility_timeout_seconds
+        self._stop = threading.Event()
+        self._lock = threading.Condition()
+        # receipt handle -> monotonic time of the last visibility lease
+        self._in_flight: Dict[str, float] = {}
+        self._acks: List[str] = []
 
     def handle_message(self, body: Dict[str, Any]) -> None:
-        msg_type = body.get("type")
-        if msg_type == "email_verification":
-            to = body.get("to")
-            code = body.get("code")
-            if to and code:
-                print(f"[Worker] Verification code for {to}: {code}")
-                send_verification_email(to, code)
-        elif msg_type == "password_reset":
-            to = body.get("to")
-            link = body.get("link")
-            if to and link:
-                print(f"[Worker] Password reset link for {to}: {link}")
-                send_reset_email(to, link)
+        # Same handler as the in-process delivery in services/mail_queue.py
+        sent = deliver_event(body)
+        if sent:
+            print(f"[Worker] {sent}")
+
+    def stop(self, *_: Any) -> None:
+        print("[Worker] Shutdown requested, finishing in-flight messages")
+        self._stop.set()
+
+    def _process(self, message: Message) -> None:
+        receipt = message.handle
+        ok = full = False
+        try:
+            self.handle_message(json.loads(message.body))
+            ok = True
+        except Exception as e:
+            # Not acknowledged: redelivered once the lease expires
+            print(f"[Worker] Error processing message: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.pop(receipt, None)
+                if ok:
+                    self._acks.append(receipt)
+                    full = len(self._acks) >= SQS_BATCH_SIZE
+                self._lock.notify_all()
+        if full:
+            self._flush_acks()
+
+    def _flush_acks(self) -> None:
+        with self._lock:
+            receipts, self._acks = self._acks, []
+        if not receipts:
+            return
+        try:
+            failed = self.transport.ack(receipts)
+        except Exception as e:
+            print(f"[Worker] Error acknowledging {len(receipts)} messages: {e}")
+            return
+        if failed:
+            print(f"[Worker] Ack failed for {failed} messages")
+
+    def _extend_visibility(self) -> None:
+        """Продлевает аренду сообщений, обработка которых заняла полтаймаута."""
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                receipt
+                for receipt, leased_at in self._in_flight.items()
+                if now - leased_at >= self.visibility / 2
+            ]
+            for receipt in due:
+                self._in_flight[receipt] = now
+        if not due:
+            return
+        try:
+            self.transport.extend(due, self.visibility)
+        except Exception as e:
+            print(f"[Worker] Error extending visibility: {e}")
+
+    def _heartbeat(self) -> None:
+        # Renews leases and flushes partial ack batches while the main
+        # thread sits in a long poll
+        interval = max(1.0, self.visibility / 4)
+        while not self._stop.wait(interval):
+            self._extend_visibility()
+            self._flush_acks()
+
+    def _free_slots(self) -> int:
+        with self._lock:
+            while len(self._in_flight) >= self.threads and not self._stop.is_set():
+                self._lock.wait(timeout=1.0)
+            return self.threads - len(self._in_flight)
 
     def run_forever(self) -> None:
-        while True:
-            resp = self.sqs.receive_message(
-                QueueUrl=self.settings.mq_queue_url,
-                MaxNumberOfMessages=10,
-                WaitTimeSeconds=10,
-                VisibilityTimeout=30,
-            )
-            for m in resp.get("Messages", []):
-                receipt = m["ReceiptHandle"]
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.stop)
+            signal.signal(signal.SIGINT, self.stop)
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        with ThreadPoolExecutor(
+            max_workers=self.threads, thread_name_prefix="mq-worker"
+        ) as pool:
+            while not self._stop.is_set():
+                # Only take what the pool can start now: queued-but-idle
+                # messages would burn their visibility lease
+                free = self._free_slots()
+                if self._stop.is_set():
+                    break
                 try:
-                    body = json.loads(m["Body"])
-                    self.handle_message(body)
-                    self.sqs.delete_message(
-                        QueueUrl=self.settings.mq_queue_url, ReceiptHandle=receipt
+                    messages = self.transport.receive(
+                        min(SQS_BATCH_SIZE, free),
+                        self.settings.mq_wait_time_seconds,
+                        self.visibility,
                     )
                 except Exception as e:
-                    print(f"[Worker] Error processing message: {e}")
+                    print(f"[Worker] Error receiving messages: {e}")
+                    self._stop.wait(1.0)
+                    continue
+                now = time.monotonic()
+                with self._lock:
+                    for m in messages:
+                        self._in_flight[m.handle] = now
+                for m in messages:
+                    pool.submit(self._process, m)
+                self._flush_acks()
+            # Leaving the block waits for running handlers; the heartbeat
+            # is stopped, so keep their leases alive from here
+            while True:
+                with self._lock:
+                    if not self._in_flight:
+                        break
+                    self._lock.wait(timeout=self.visibility / 4)
+                self._extend_visibility()
+        self._flush_acks()
+        close_smtp_pool()
+        print("[Worker] Stopped")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+import argparse
+import asyncio
+
+from backend.db.session import AsyncSessionLocal
+from backend.repositories.recipes import RecipeRepository
+
+
+async def recount(batch_size: int) -> int:
+    async with AsyncSessionLocal() as db:
+        return await RecipeRepository(db).recount_likes(batch_size=batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Recount recipes.likes_count from the likes table"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    fixed = asyncio.run(recount(args.batch_size))
+    print(f"[Recount] Fixed likes_count on {fixed} recipes")
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from backend.db.session import AsyncSessionLocal
+from backend.repositories.pending_deletes import PendingDeleteRepository
+from backend.services import images
+from backend.services.storage import (
+    DELETE_BATCH_SIZE,
+    delete_objects,
+    key_from_url,
+    list_objects,
+)
+
+# Everything the app writes lives under these prefixes
+PREFIXES = ("recipes/", "avatars/")
+
+
+async def sweep(batch_size: int) -> int:
+    """Удаляет объекты из pending_deletes пачками, пока очередь не опустеет."""
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            repo = PendingDeleteRepository(db)
+            rows = await repo.claim_batch(batch_size)
+            if not rows:
+                return total
+            keys = sorted({row.key for row in rows})
+            deleted = await asyncio.to_thread(delete_objects, keys)
+            await repo.remove(row.id for row in rows if row.key in deleted)
+            await db.commit()
+        total += len(deleted)
+        if len(deleted) < len(keys):
+            # Failed keys stay queued for the next run instead of spinning here
+            print(f"[Sweeper] {len(keys) - len(deleted)} keys failed, retry later")
+            return total
+
+
+async def reconcile(grace_hours: float) -> int:
+    """Ставит в очередь объекты бакета, на которые не ссылается ни одна строка.
+
+    Новые объекты (моложе grace_hours) не трогаем: загрузка по presigned POST
+    или генерация копий могли закончиться раньше, чем запись в БД.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=grace_hours)
+    async with AsyncSessionLocal() as db:
+        repo = PendingDeleteRepository(db)
+        referenced = {
+            key_from_url(url)
+            for url in images.with_derivatives(await repo.referenced_urls())
+        }
+        referenced |= await repo.queued_keys()
+
+        def orphans() -> list[str]:
+            return [
+                key
+                for prefix in PREFIXES
+                for key, modified in list_objects(prefix)
+                if key not in referenced and modified < cutoff
+            ]
+
+        keys = await asyncio.to_thread(orphans)
+        repo.add_keys(keys)
+        await db.commit()
+    return len(keys)
+
+
+async def run(args: argparse.Namespace) -> bool:
+    """Главный цикл; False, если проход --once завершился ошибкой."""
+    reconcile_pending = args.reconcile
+    while True:
+        ok = True
+        # A DB or S3 hiccup must not kill the long-running worker: log it
+        # and retry on the next pass
+        if reconcile_pending:
+            try:
+                queued = await reconcile(args.grace_hours)
+                print(f"[Sweeper] Reconcile queued {queued} orphaned objects")
+                reconcile_pending = False
+            except Exception as e:
+                print(f"[Sweeper] Error reconciling bucket: {e}")
+                ok = False
+        try:
+            deleted = await sweep(args.batch_size)
+            if deleted:
+                print(f"[Sweeper] Deleted {deleted} objects")
+        except Exception as e:
+            print(f"[Sweeper] Error sweeping pending deletes: {e}")
+            ok = False
+        if args.once:
+            return ok
+        await asyncio.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete S3 objects queued in pending_deletes"
+    )
+    parser.add_argument("--once", action="store_true", help="single pass, then exit")
+    parser.add_argument("--interval", type=float, default=60.0)
+    parser.add_argument("--batch-size", type=int, default=DELETE_BATCH_SIZE)
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="queue bucket objects no row references before sweeping",
+    )
+    parser.add_argument("--grace-hours", type=float, default=24.0)
+    args = parser.parse_args()
+    args.batch_size = max(1, min(args.batch_size, DELETE_BATCH_SIZE))
+    sys.exit(0 if asyncio.run(run(args)) else 1)